@@ -0,0 +1,80 @@
+"""baseline schema
+
+The tables as the app created them with create_all before migrations
+existed. Databases that already have them (every deployment predating
+Alembic) adopt this revision without changes, so ``alembic upgrade head``
+works on them as on an empty database.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 04:31:41.662462
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('user_type', sa.String(), nullable=False),
+        sa.Column('is_verified', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_id', 'users', ['id'], unique=False)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    if 'files' not in existing:
+        op.create_table('files',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('original_filename', sa.String(), nullable=False),
+        sa.Column('file_path', sa.String(), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('file_type', sa.String(), nullable=False),
+        sa.Column('uploader_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['uploader_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_files_id', 'files', ['id'], unique=False)
+
+    if 'download_tokens' not in existing:
+        op.create_table('download_tokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(), nullable=False),
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_used', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_download_tokens_id', 'download_tokens', ['id'], unique=False)
+        op.create_index('ix_download_tokens_token', 'download_tokens', ['token'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_table('download_tokens')
+    op.drop_table('files')
+    op.drop_table('users')
@@ -0,0 +1,88 @@
+"""content-addressed blobs, upload sessions, verification tokens and indexes
+
+Adds files.sha256 and the blobs table it refers to (existing files keep a
+NULL digest until ``python -m app.blobstore`` moves them into the store),
+the upload_sessions and verification_tokens tables, and the indexes for
+keyset pagination, one-statement token redemption and the token purge.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 05:20:12.417035
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+
+    # Batch mode, so SQLite gets the foreign key by copying the table
+    with op.batch_alter_table('files') as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('files_sha256_fkey', 'blobs', ['sha256'], ['sha256'])
+    op.create_index('ix_files_sha256', 'files', ['sha256'], unique=False)
+    # Keyset pagination of /files/list, optionally per uploader
+    op.create_index('ix_files_created_at_id', 'files', ['created_at', 'id'], unique=False)
+    op.create_index('ix_files_uploader_created_at_id', 'files', ['uploader_id', 'created_at', 'id'], unique=False)
+
+    # Token redemption in one statement, and the background purge of expired tokens
+    op.create_index(
+        'ix_download_tokens_token_is_used_expires_at', 'download_tokens', ['token', 'is_used', 'expires_at'], unique=False
+    )
+    op.create_index('ix_download_tokens_expires_at', 'download_tokens', ['expires_at'], unique=False)
+
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('uploader_id', sa.Integer(), nullable=False),
+    sa.Column('original_filename', sa.String(), nullable=False),
+    sa.Column('file_type', sa.String(), nullable=False),
+    sa.Column('total_size', sa.Integer(), nullable=False),
+    sa.Column('chunk_size', sa.Integer(), nullable=False),
+    sa.Column('chunk_count', sa.Integer(), nullable=False),
+    sa.Column('is_completing', sa.Boolean(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['uploader_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_upload_sessions_expires_at', 'upload_sessions', ['expires_at'], unique=False)
+
+    op.create_table('verification_tokens',
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('token', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('email')
+    )
+    op.create_index('ix_verification_tokens_expires_at', 'verification_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_table('verification_tokens')
+    op.drop_table('upload_sessions')
+    op.drop_index('ix_download_tokens_expires_at', table_name='download_tokens')
+    op.drop_index('ix_download_tokens_token_is_used_expires_at', table_name='download_tokens')
+    op.drop_index('ix_files_uploader_created_at_id', table_name='files')
+    op.drop_index('ix_files_created_at_id', table_name='files')
+    op.drop_index('ix_files_sha256', table_name='files')
+    with op.batch_alter_table('files') as batch_op:
+        batch_op.drop_constraint('files_sha256_fkey', type_='foreignkey')
+        batch_op.drop_column('sha256')
+    op.drop_table('blobs')
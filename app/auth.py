@@ -1,26 +1,51 @@
+import asyncio
 from datetime import datetime, timedelta, UTC
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.config import settings
+from app.metrics import JWT_SECONDS
+from app.password_pool import password_pool
 from app.schemas import TokenData
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# jose and passlib are imported on first use rather than with the app;
+# warm_auth_backends() pays that cost during startup instead
+
+# bcrypt hash of "warmup" at the default cost, verified by every worker on startup
+_WARMUP_HASH = "$2b$12$UHGl4a0ttUf.Z2aEmdUN1OYbyX5i.9qpivKVtpMKDaYugZGJZFtFq"
+
+
+@lru_cache(maxsize=None)
+def pwd_context():
+    """The password hashing context, created on first use"""
+    from passlib.context import CryptContext
+    
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool"""
+    return await password_pool.run(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
+    from jose import jwt
+    
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(UTC) + expires_delta
@@ -28,25 +53,41 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(UTC) + timedelta(minutes=settings.access_token_expire_minutes)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    with JWT_SECONDS.labels("encode").time():
+        encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
 def verify_token(token: str) -> Optional[TokenData]:
     """Verify and decode a JWT token"""
+    from jose import JWTError, jwt
+    
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        with JWT_SECONDS.labels("decode").time():
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
         user_type: str = payload.get("user_type")
         
         if email is None:
             return None
         
-        return TokenData(email=email, user_type=user_type)
+        exp = payload.get("exp")
+        expires_at = datetime.fromtimestamp(exp, UTC) if exp is not None else None
+        
+        return TokenData(email=email, user_type=user_type, expires_at=expires_at)
     except JWTError:
         return None
 
 
+async def warm_auth_backends() -> None:
+    """Load the JWT and bcrypt backends and start every password hashing worker"""
+    token = create_access_token({"sub": "warmup@localhost"}, timedelta(seconds=30))
+    verify_token(token)
+    await asyncio.gather(*(
+        verify_password_async("warmup", _WARMUP_HASH) for _ in range(password_pool.workers)
+    ))
+
+
 def generate_secure_token() -> str:
     """Generate a secure random token for download links"""
     import secrets
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+import aiofiles
+import aiofiles.os
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import Blob, File
+from app.storage_backends import storage
+
+logger = logging.getLogger(__name__)
+
+
+def blob_path(sha256: str) -> str:
+    """Location of the blob with the given digest in the storage backend"""
+    return storage.blob_location(sha256)
+
+
+async def _add_reference(db: AsyncSession, sha256: str, delta: int) -> Optional[Blob]:
+    """Change a blob's reference count in one statement, or None if there is no such blob.
+
+    The increment happens in the database rather than as a read-modify-write,
+    so concurrent uploads and deletes of the same content never lose an update,
+    including on SQLite where FOR UPDATE is not available.
+    """
+    return await db.scalar(
+        update(Blob)
+        .where(Blob.sha256 == sha256)
+        .values(ref_count=Blob.ref_count + delta)
+        .returning(Blob)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+async def acquire_blob(db: AsyncSession, sha256: str, size: int, source_path: str) -> Blob:
+    """Take a reference on the blob holding this content.
+
+    If the content is new, the local file ``source_path`` is moved into the
+    storage backend; if it is already stored, ``source_path`` is simply
+    removed so the duplicate is never stored. The caller commits the session.
+    """
+    while True:
+        blob = await _add_reference(db, sha256, 1)
+        if blob is not None:
+            break
+
+        path = blob_path(sha256)
+        try:
+            async with db.begin_nested():
+                blob = Blob(sha256=sha256, file_path=path, size=size, ref_count=1)
+                db.add(blob)
+        except IntegrityError:
+            # A concurrent upload of the same content created the row first;
+            # take a reference on it, or create it again if it is already gone
+            continue
+        # The row is written before the content: a discard_blob of the same
+        # digest holds the row until its delete is committed, so it has
+        # finished by now and cannot remove what is stored here
+        await storage.put(source_path, path)
+        return blob
+
+    if await storage.size(blob.file_path) is not None:
+        await aiofiles.os.remove(source_path)
+    else:
+        # The stored copy went missing; restore it from this upload
+        logger.warning("Blob %s was missing from storage, restoring it", sha256)
+        await storage.put(source_path, blob.file_path)
+    return blob
+
+
+async def release_blob(db: AsyncSession, sha256: str) -> Optional[str]:
+    """Drop a reference on a blob.
+
+    When the last reference goes, the row is kept with a count of zero and
+    its storage path is returned. The caller commits the session and then
+    passes the path to ``discard_blob``; until then an upload of the same
+    content simply takes the row back.
+    """
+    blob = await _add_reference(db, sha256, -1)
+    if blob is None or blob.ref_count > 0:
+        return None
+    db.expunge(blob)
+    return blob.file_path
+
+
+async def discard_blob(db: AsyncSession, sha256: str, path: str) -> None:
+    """Delete a released blob's row and content, unless it was taken again.
+
+    Runs in its own transaction. Deleting the row locks it, and the delete
+    is only committed once the content is gone, so a concurrent
+    ``acquire_blob`` either revived the row first (the content is kept) or
+    waits and then finds no row and stores the content again.
+    """
+    deleted = await db.scalar(
+        delete(Blob)
+        .where(Blob.sha256 == sha256, Blob.ref_count <= 0)
+        .returning(Blob.sha256)
+        .execution_options(synchronize_session=False)
+    )
+    if deleted is not None:
+        await storage.delete(path)
+    await db.commit()
+
+
+async def hash_file(path: str) -> str:
+    """SHA-256 of a file on disk, read in chunks"""
+    digest = hashlib.sha256()
+    async with aiofiles.open(path, "rb") as f:
+        while chunk := await f.read(settings.upload_chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def migrate_legacy_files() -> int:
+    """Move files stored locally under per-upload names into the content-addressed store.
+
+    Each file is hashed in place and either moved into the store or, when the
+    content is already stored, deleted in favour of the existing blob. Safe to
+    run repeatedly; returns the number of files migrated.
+    """
+    from app.database import SessionLocal
+
+    migrated = 0
+    async with SessionLocal() as db:
+        file_ids = (await db.scalars(select(File.id).order_by(File.id))).all()
+        for file_id in file_ids:
+            file = await db.get(File, file_id)
+            if file.sha256 and file.file_path == blob_path(file.sha256):
+                continue
+            if not await aiofiles.os.path.exists(file.file_path):
+                logger.warning("File %s is missing on disk (%s), skipping", file.id, file.file_path)
+                continue
+
+            size = await aiofiles.os.path.getsize(file.file_path)
+            sha256 = await hash_file(file.file_path)
+            blob = await acquire_blob(db, sha256, size, file.file_path)
+            file.sha256 = sha256
+            file.file_path = blob.file_path
+            file.file_size = size
+            await db.commit()
+            migrated += 1
+    return migrated
+
+
+async def _main() -> int:
+    from app.database import engine
+    from app.storage_backends import prepare_storage
+
+    await prepare_storage()
+    try:
+        return await migrate_legacy_files()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    count = asyncio.run(_main())
+    print(f"Migrated {count} files into the content-addressed store")
@@ -1,27 +1,57 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import AsyncIterator
+from litestar import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from app.config import settings
+from app.db_pool import InstrumentedPool, connection_owner, instrument_pool
+from app.query_profiler import instrument_engine
 import os
 
+
+def async_database_url(url: str) -> str:
+    """Point a database URL at the asyncio driver for its backend"""
+    if url.startswith(("postgresql://", "postgresql+psycopg2://", "postgres://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
 # Create database engine
 # Use test database if TESTING environment variable is set
 if os.getenv("TESTING"):
-    database_url = "sqlite:///./test.db"
-    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+    database_url = "sqlite+aiosqlite:///./test.db"
 else:
-    engine = create_engine(settings.database_url)
+    database_url = async_database_url(settings.database_url)
+
+engine = create_async_engine(
+    database_url,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping
+)
+instrument_pool(engine.sync_engine.pool)
+if settings.query_profiling:
+    instrument_engine(engine.sync_engine)
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
-    try:
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """Dependency providing the request's database session, closed once the handler returns"""
+    connection_owner.set(f"{request.method} {request.url.path}")
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def create_tables() -> None:
+    """Create any missing tables"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
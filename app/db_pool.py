@@ -0,0 +1,124 @@
+import logging
+import time
+import traceback
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.config import settings
+from app.metrics import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT, DB_POOL_LEAKS, DB_POOL_TIMEOUTS
+
+logger = logging.getLogger(__name__)
+
+# What is holding a checked-out connection, e.g. "GET /files/list"; set per request
+connection_owner: ContextVar[str] = ContextVar("connection_owner", default="background")
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how long requests wait for pooled connections"""
+    checkouts: int = 0
+    timeouts: int = 0
+    slow_checkouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    leaks_reported: int = 0
+
+    def record_wait(self, waited: float) -> None:
+        self.checkouts += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+
+@dataclass
+class Checkout:
+    owner: str
+    started: float
+    stack: Optional[str] = None
+    reported: bool = False
+
+
+pool_stats = PoolStats()
+
+# Connections currently checked out, keyed by connection record
+_checkouts: Dict[int, Checkout] = {}
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that times how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.timeouts += 1
+            DB_POOL_TIMEOUTS.inc()
+            logger.error(
+                "Timed out after %.1fs waiting for a database connection (%s); pool status: %s",
+                time.perf_counter() - start, connection_owner.get(), self.status()
+            )
+            raise
+
+        waited = time.perf_counter() - start
+        pool_stats.record_wait(waited)
+        DB_POOL_CHECKOUT_WAIT.observe(waited)
+        if waited >= settings.db_pool_slow_checkout:
+            pool_stats.slow_checkouts += 1
+            logger.warning(
+                "Waited %.3fs for a database connection (%s); pool status: %s",
+                waited, connection_owner.get(), self.status()
+            )
+        return connection
+
+
+def instrument_pool(pool: InstrumentedPool) -> None:
+    """Track which connections are checked out, and by whom"""
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _checkouts[id(connection_record)] = Checkout(
+            owner=connection_owner.get(),
+            started=time.monotonic(),
+            stack="".join(traceback.format_stack(limit=12)) if settings.db_track_checkout_stacks else None
+        )
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        if _checkouts.pop(id(connection_record), None) is not None:
+            DB_POOL_CHECKED_OUT.dec()
+
+
+def pool_snapshot(pool: InstrumentedPool) -> dict:
+    """Current pool occupancy together with the accumulated wait statistics"""
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "idle": pool.checkedin(),
+        "checkouts": pool_stats.checkouts,
+        "timeouts": pool_stats.timeouts,
+        "slow_checkouts": pool_stats.slow_checkouts,
+        "mean_wait": pool_stats.total_wait / pool_stats.checkouts if pool_stats.checkouts else 0.0,
+        "max_wait": pool_stats.max_wait,
+        "leaks_reported": pool_stats.leaks_reported,
+    }
+
+
+async def report_leaked_connections() -> None:
+    """Log connections that have been checked out for longer than ``db_connection_leak_timeout``"""
+    now = time.monotonic()
+    for checkout in list(_checkouts.values()):
+        held = now - checkout.started
+        if checkout.reported or held < settings.db_connection_leak_timeout:
+            continue
+        checkout.reported = True
+        pool_stats.leaks_reported += 1
+        DB_POOL_LEAKS.inc()
+        logger.warning(
+            "Database connection held for %.0fs by %s, possibly leaked%s",
+            held, checkout.owner, f"; checked out at:\n{checkout.stack}" if checkout.stack else ""
+        )
@@ -1,52 +1,65 @@
-from typing import Optional
 from litestar import Request
 from litestar.exceptions import NotAuthorizedException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.auth import verify_token
 from app.models import User
-from app.schemas import TokenData
+from app.principal_cache import Principal, principal_cache
 
 
-def get_current_user(request: Request) -> User:
-    """Get current authenticated user"""
+async def get_current_user(request: Request, db: AsyncSession) -> Principal:
+    """Get current authenticated user
+    
+    Principals are cached per bearer token, so repeat requests skip both the
+    JWT decode and the user lookup.
+    """
     authorization = request.headers.get("Authorization")
     if not authorization or not authorization.startswith("Bearer "):
         raise NotAuthorizedException("Invalid authorization header")
     
     token = authorization.split(" ")[1]
+    principal = await principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
     token_data = verify_token(token)
     
     if not token_data:
         raise NotAuthorizedException("Invalid token")
     
-    db = next(get_db())
-    user = db.query(User).filter(User.email == token_data.email).first()
+    stamp = await principal_cache.stamp(token_data.email)
+    user = (await db.execute(
+        select(User.id, User.email, User.username, User.user_type, User.is_verified)
+        .where(User.email == token_data.email)
+    )).first()
     
     if not user:
         raise NotAuthorizedException("User not found")
     
-    return user
+    principal = Principal(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        user_type=user.user_type,
+        is_verified=user.is_verified
+    )
+    await principal_cache.set(token, principal, token_data.expires_at, stamp)
+    return principal
 
 
-def get_current_ops_user(request: Request) -> User:
+async def get_current_ops_user(request: Request, db: AsyncSession) -> Principal:
     """Get current authenticated Ops user"""
-    user = get_current_user(request)
+    user = await get_current_user(request, db)
     if user.user_type != "ops":
         raise NotAuthorizedException("Access denied. Ops user required.")
     return user
 
 
-def get_current_client_user(request: Request) -> User:
+async def get_current_client_user(request: Request, db: AsyncSession) -> Principal:
     """Get current authenticated Client user"""
-    user = get_current_user(request)
+    user = await get_current_user(request, db)
     if user.user_type != "client":
         raise NotAuthorizedException("Access denied. Client user required.")
     if not user.is_verified:
         raise NotAuthorizedException("Email verification required.")
     return user
-
-
-def get_db_session(request: Request) -> Session:
-    """Get database session"""
-    return next(get_db())
@@ -1,19 +1,18 @@
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.mail_queue import mail_queue
 
 
 class EmailService:
     def __init__(self):
         self.smtp_server = settings.smtp_server
         self.smtp_port = settings.smtp_port
-        self.smtp_username = settings.smtp_username
-        self.smtp_password = settings.smtp_password
+        self.sender = settings.smtp_from or settings.smtp_username
     
     def send_verification_email(self, email: str, verification_token: str, base_url: str) -> bool:
-        """Send verification email to user"""
-        if not all([self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password]):
+        """Queue a verification email to user; delivery happens in the background"""
+        if not all([self.smtp_server, self.smtp_port, self.sender]):
             # In development, just log the verification token
             print(f"Verification token for {email}: {verification_token}")
             return True
@@ -21,7 +20,7 @@ class EmailService:
         try:
             # Create message
             msg = MIMEMultipart()
-            msg['From'] = self.smtp_username
+            msg['From'] = self.sender
             msg['To'] = email
             msg['Subject'] = "Email Verification - File Sharing System"
             
@@ -47,17 +46,10 @@ class EmailService:
             
             msg.attach(MIMEText(body, 'plain'))
             
-            # Send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.smtp_username, self.smtp_password)
-            text = msg.as_string()
-            server.sendmail(self.smtp_username, email, text)
-            server.quit()
-            
-            return True
+            # Hand the email to the mail queue
+            return mail_queue.enqueue(msg, email)
         except Exception as e:
-            print(f"Failed to send email: {e}")
+            print(f"Failed to queue email: {e}")
             return False
 
 
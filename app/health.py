@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import signal
+import threading
+from typing import Optional
+from litestar import Response, get
+from sqlalchemy import text
+from app.auth import warm_auth_backends
+from app.config import settings
+from app.database import engine
+from app.db_pool import connection_owner
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Whether this worker should be sent traffic.
+
+    A worker is ready once its warm-up has run and until shutdown begins;
+    /readyz also requires the database to answer.
+    """
+
+    def __init__(self):
+        self.warmed = False
+        self.draining = False
+        self.database_reachable = True
+        self._warmup: Optional[asyncio.Task] = None
+
+    async def _warm_database(self) -> None:
+        """Open the pool's connections up front so the first requests do not connect"""
+        count = min(settings.db_warmup_connections or settings.db_pool_size, settings.db_pool_size)
+        connection_owner.set("startup warm-up")
+
+        async def open_connection() -> None:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        await asyncio.gather(*(open_connection() for _ in range(count)))
+
+    async def _warm(self) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(self._warm_database(), warm_auth_backends(), return_exceptions=True)
+        for name, result in zip(("database pool", "auth backends"), results, strict=True):
+            if isinstance(result, Exception):
+                logger.warning("Warm-up of %s failed: %s", name, result)
+        self.warmed = True
+        logger.info("Warm-up finished in %.3fs", loop.time() - start)
+
+    def _drain_on_sigterm(self) -> None:
+        """Put ``drain_delay`` seconds of draining in front of the server's SIGTERM handler.
+
+        /readyz fails at once while requests are still served, so load
+        balancers stop routing here before the server stops accepting.
+        Repeated SIGTERMs (a supervisor forwarding the one its process group
+        already got) do not cut the drain short; SIGINT still exits at once.
+        """
+        if not settings.drain_delay or threading.current_thread() is not threading.main_thread():
+            return
+        exit_handler = signal.getsignal(signal.SIGTERM)
+        if not callable(exit_handler):
+            return  # the server does not handle SIGTERM itself
+        loop = asyncio.get_running_loop()
+        received = False
+
+        def handle_sigterm(sig, frame) -> None:
+            nonlocal received
+            if received:
+                return
+            received = True
+            self.draining = True
+            logger.info("Received SIGTERM, draining for %.1fs", settings.drain_delay)
+            loop.call_soon_threadsafe(loop.call_later, settings.drain_delay, exit_handler, sig, frame)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    async def start(self) -> None:
+        """Startup hook warming up in the background, so the server starts accepting at once"""
+        self.warmed = False
+        self.draining = False
+        self._drain_on_sigterm()
+        self._warmup = asyncio.create_task(self._warm(), name="warm-up")
+
+    async def drain(self) -> None:
+        """Shutdown hook failing /readyz, so load balancers stop routing here"""
+        self.draining = True
+        if self._warmup is not None and not self._warmup.done():
+            self._warmup.cancel()
+
+    async def database_ok(self) -> bool:
+        """Whether the database answers within ``readiness_timeout``; changes are logged once"""
+        try:
+            async with asyncio.timeout(settings.readiness_timeout):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            if self.database_reachable:
+                logger.warning("Readiness check could not reach the database: %s", e)
+            self.database_reachable = False
+            return False
+        if not self.database_reachable:
+            logger.info("Readiness check reached the database again")
+        self.database_reachable = True
+        return True
+
+
+readiness = Readiness()
+
+
+@get("/healthz", include_in_schema=False)
+async def healthz() -> dict:
+    """Liveness: the worker is up and its event loop is responding"""
+    return {"status": "ok"}
+
+
+@get("/readyz", include_in_schema=False)
+async def readyz() -> Response:
+    """Readiness: warmed up, not shutting down, and the database answers"""
+    checks = {
+        "warmed": readiness.warmed,
+        "draining": readiness.draining,
+        "database": not readiness.draining and await readiness.database_ok(),
+    }
+    ready = checks["warmed"] and not checks["draining"] and checks["database"]
+    return Response(
+        content={"status": "ready" if ready else "unavailable", "checks": checks},
+        status_code=200 if ready else 503,
+    )
@@ -0,0 +1,51 @@
+import os
+import secrets
+import socket
+from datetime import datetime, timedelta, UTC
+from sqlalchemy import delete as sql_delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal
+from app.models import MaintenanceLease
+
+# Leases let one worker among many run a maintenance task. They live in the
+# database, the one thing every worker on every host shares, and expire so
+# another worker takes over when the holder dies without releasing them.
+
+# This worker process as a lease holder
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+
+
+async def acquire_lease(name: str, ttl: float) -> bool:
+    """Take or renew the lease ``name`` for ``ttl`` seconds; False while another worker holds it"""
+    now = datetime.now(UTC)
+    values = {"holder": WORKER_ID, "expires_at": now + timedelta(seconds=ttl)}
+    async with SessionLocal() as db:
+        renewed = await db.execute(
+            update(MaintenanceLease)
+            .where(
+                MaintenanceLease.name == name,
+                or_(MaintenanceLease.holder == WORKER_ID, MaintenanceLease.expires_at < now)
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if not renewed.rowcount:
+            try:
+                await db.execute(insert(MaintenanceLease).values(name=name, **values))
+            except IntegrityError:
+                # Held by another worker
+                await db.rollback()
+                return False
+        await db.commit()
+    return True
+
+
+async def release_lease(name: str) -> None:
+    """Give up the lease ``name`` if this worker holds it, so another can take over at once"""
+    async with SessionLocal() as db:
+        await db.execute(
+            sql_delete(MaintenanceLease)
+            .where(MaintenanceLease.name == name, MaintenanceLease.holder == WORKER_ID)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
@@ -0,0 +1,54 @@
+import hashlib
+import time
+from typing import Optional, Tuple
+from litestar.stores.base import Store
+from app.config import settings
+from app.stores import stores
+
+FILE_LIST_STORE = "file-list"
+VERSION_KEY = "files:version"
+
+
+def file_list_store() -> Store:
+    return stores.get(FILE_LIST_STORE)
+
+
+def _new_version() -> str:
+    # Nanosecond timestamps never repeat, so concurrent bumps from different
+    # workers can never leave the version unchanged
+    return f"{time.time_ns():x}"
+
+
+def version_timestamp(version: str) -> float:
+    """Seconds since the epoch at which the file list last changed"""
+    return int(version, 16) / 1e9
+
+
+async def get_files_version() -> str:
+    """Current version of the file list, shared by every worker"""
+    store = file_list_store()
+    version = await store.get(VERSION_KEY)
+    if version is None:
+        version = _new_version().encode()
+        await store.set(VERSION_KEY, version)
+    return version.decode()
+
+
+async def bump_files_version() -> None:
+    """Invalidate every cached file list; call after committing a change to ``files``"""
+    await file_list_store().set(VERSION_KEY, _new_version())
+
+
+def list_cache_key(version: str, query_string: str) -> Tuple[str, str]:
+    """Cache key and ETag for a /files/list response at ``version``"""
+    params = "&".join(sorted(part for part in query_string.split("&") if part))
+    digest = hashlib.sha1(params.encode()).hexdigest()[:16]
+    return f"list:{version}:{digest}", f'"{version}-{digest}"'
+
+
+async def get_cached_list(key: str) -> Optional[bytes]:
+    return await file_list_store().get(key)
+
+
+async def set_cached_list(key: str, body: bytes) -> None:
+    await file_list_store().set(key, body, expires_in=settings.list_cache_ttl)
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import smtplib
+from dataclasses import dataclass
+from email.message import Message
+from typing import Dict, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMail:
+    message: Message
+    to: str
+    attempts: int = 0
+
+
+@dataclass
+class MailQueueStats:
+    """Counters for outbound mail"""
+    enqueued: int = 0
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    rejected: int = 0
+    batches: int = 0
+    connections: int = 0
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies and refused recipients won't get better by retrying"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class SMTPConnection:
+    """A persistent SMTP session, only ever used from one worker at a time.
+
+    The blocking smtplib calls run in a thread; connecting, STARTTLS and
+    login happen once and the session is reused for every batch after.
+    """
+
+    def __init__(self, stats: MailQueueStats):
+        self.stats = stats
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._smtp is not None
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=settings.smtp_timeout)
+        try:
+            if settings.smtp_use_tls:
+                smtp.starttls()
+            if settings.smtp_username and settings.smtp_password:
+                smtp.login(settings.smtp_username, settings.smtp_password)
+        except Exception:
+            smtp.close()
+            raise
+        self.stats.connections += 1
+        return smtp
+
+    def _send(self, mail: OutgoingMail) -> None:
+        if self._smtp is None:
+            self._smtp = self._connect()
+        try:
+            self._smtp.send_message(mail.message, to_addrs=[mail.to])
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle session; try once on a fresh one
+            self._smtp = self._connect()
+            self._smtp.send_message(mail.message, to_addrs=[mail.to])
+
+    def send_batch(self, batch: List[OutgoingMail]) -> List[Optional[Exception]]:
+        """Send every message over this session, returning the error (if any) for each"""
+        errors = []
+        for mail in batch:
+            try:
+                self._send(mail)
+                errors.append(None)
+            except Exception as error:
+                errors.append(error)
+                if not isinstance(error, smtplib.SMTPResponseException):
+                    # Connection-level trouble; start over with the next message
+                    self.close()
+        return errors
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+
+class MailQueue:
+    """Outbound mail queue drained by background workers.
+
+    Each worker owns one SMTP connection and sends up to ``batch_size``
+    queued messages per round over it. Transient failures are retried with
+    exponential backoff; messages are kept in memory only, so whatever is
+    still queued when the shutdown timeout runs out is lost.
+    """
+
+    def __init__(self, workers: int, batch_size: int, max_size: int):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.stats = MailQueueStats()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._tasks: List[asyncio.Task] = []
+        self._connections: List[SMTPConnection] = []
+        # Messages waiting out their backoff, keyed by id()
+        self._retries: Dict[int, asyncio.TimerHandle] = {}
+
+    def enqueue(self, message: Message, to: str) -> bool:
+        """Queue a message for delivery; False if the queue is full"""
+        try:
+            self._queue.put_nowait(OutgoingMail(message, to))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            logger.error("Mail queue full, dropping message to %s", to)
+            return False
+        self.stats.enqueued += 1
+        return True
+
+    async def _next_batch(self, connection: SMTPConnection) -> List[OutgoingMail]:
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout=settings.mail_connection_idle_timeout)
+        except asyncio.TimeoutError:
+            # Don't hold a session open on the server while there's nothing to send
+            if connection.is_open:
+                await asyncio.to_thread(connection.close)
+            first = await self._queue.get()
+        batch = [first]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _worker(self, connection: SMTPConnection) -> None:
+        while True:
+            batch = await self._next_batch(connection)
+            try:
+                errors = await asyncio.to_thread(connection.send_batch, batch)
+                self.stats.batches += 1
+                for mail, error in zip(batch, errors, strict=True):
+                    if error is None:
+                        self.stats.sent += 1
+                    else:
+                        self._retry(mail, error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _retry(self, mail: OutgoingMail, error: Exception) -> None:
+        mail.attempts += 1
+        if _is_permanent(error) or mail.attempts >= settings.mail_max_attempts:
+            self.stats.failed += 1
+            logger.error("Giving up on mail to %s after %d attempts: %s", mail.to, mail.attempts, error)
+            return
+        delay = settings.mail_retry_backoff * 2 ** (mail.attempts - 1)
+        logger.warning("Sending mail to %s failed (%s), retrying in %.1fs", mail.to, error, delay)
+        self.stats.retried += 1
+        self._retries[id(mail)] = asyncio.get_running_loop().call_later(delay, self._requeue, mail)
+
+    def _requeue(self, mail: OutgoingMail) -> None:
+        del self._retries[id(mail)]
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            self.stats.failed += 1
+            logger.error("Mail queue full, dropping retried message to %s", mail.to)
+
+    async def start(self) -> None:
+        """Startup hook starting the workers"""
+        if self._tasks:
+            return
+        for index in range(self.workers):
+            connection = SMTPConnection(self.stats)
+            self._connections.append(connection)
+            self._tasks.append(asyncio.create_task(self._worker(connection), name=f"mail-worker-{index}"))
+
+    async def stop(self) -> None:
+        """Shutdown hook sending what is queued, within the shutdown timeout"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.mail_shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Mail queue not drained on shutdown, %d messages lost", self._queue.qsize())
+        if self._retries:
+            logger.warning("%d messages waiting to be retried lost on shutdown", len(self._retries))
+        for handle in self._retries.values():
+            handle.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for connection in self._connections:
+            await asyncio.to_thread(connection.close)
+        self._tasks.clear()
+        self._connections.clear()
+        self._retries.clear()
+
+    def snapshot(self) -> dict:
+        """Queue depth together with the delivery counters"""
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.stats.enqueued,
+            "sent": self.stats.sent,
+            "retried": self.stats.retried,
+            "failed": self.stats.failed,
+            "rejected": self.stats.rejected,
+            "batches": self.stats.batches,
+            "connections": self.stats.connections,
+        }
+
+
+mail_queue = MailQueue(settings.mail_workers, settings.mail_batch_size, settings.mail_queue_size)
@@ -1,31 +1,111 @@
+import os
+import socket
 from litestar import Litestar, get
+from litestar.di import Provide
 from litestar.config.cors import CORSConfig
 from litestar.contrib.pydantic import PydanticInitPlugin
 from app.routes.auth import auth_router
 from app.routes.files import files_router
-from app.database import engine, Base
+from app.database import create_tables, engine, get_db
+from app.db_pool import report_leaked_connections
 from app.config import settings
+from app.tasks import register_periodic_task, start_periodic_tasks, stop_periodic_tasks
+from app.upload_sessions import purge_expired_upload_sessions
+from app.stores import stores, delete_expired_entries, open_stores
+from app.storage_backends import prepare_storage
+from app.health import healthz, readiness, readyz
+from app.password_pool import password_pool
+from app.mail_queue import mail_queue
+from app.signed_links import delete_expired_replay_entries
+from app.token_purge import purge_download_tokens
+from app.metrics import MetricsController, mark_worker_dead, metrics_config
+from app.query_profiler import QueryProfilerMiddleware
+from app.verification_tokens import delete_expired_verification_tokens
 
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 @get("/")
 async def root() -> dict:
     return {"message": "Hello, World!"}
 
-# Create Litestar app
-app = Litestar(
-    route_handlers=[root, auth_router, files_router],
-    plugins=[PydanticInitPlugin(validate_strict=True)],
-    cors_config=CORSConfig(
-            allow_origins=["*"],
-            allow_credentials=True,
-            allow_methods=["*"],
-            allow_headers=["*"],
-        ),
-    debug=settings.debug
-)
+
+def register_maintenance_tasks() -> None:
+    """Background maintenance run for the app's lifetime.
+
+    Every worker starts these, but work on the database takes a lease so one
+    worker does it. File stores are shared by the workers on a host, so
+    their cleanup takes a lease per host; memory stores are per worker.
+    """
+    host = socket.gethostname()
+    shared_stores = settings.store_backend == "file"
+    store_lease = f"store-cleanup@{host}" if shared_stores else None
+    replay_lease = f"download-replay-cleanup@{host}" if shared_stores else None
+    if settings.verification_token_backend == "database":
+        verification_lease = "verification-token-gc"
+    else:
+        verification_lease = f"verification-token-gc@{host}" if shared_stores else None
+
+    register_periodic_task(
+        "upload-session-gc", settings.upload_session_gc_interval, purge_expired_upload_sessions,
+        lease="upload-session-gc"
+    )
+    register_periodic_task("store-cleanup", settings.store_cleanup_interval, delete_expired_entries, lease=store_lease)
+    register_periodic_task(
+        "download-replay-cleanup", settings.store_cleanup_interval, delete_expired_replay_entries, lease=replay_lease
+    )
+    register_periodic_task(
+        "download-token-purge", settings.download_token_purge_interval, purge_download_tokens,
+        lease="download-token-purge"
+    )
+    register_periodic_task(
+        "verification-token-gc", settings.verification_token_gc_interval, delete_expired_verification_tokens,
+        lease=verification_lease
+    )
+    register_periodic_task("db-leak-check", settings.db_leak_check_interval, report_leaked_connections)
+
+
+def create_app() -> Litestar:
+    """Build the application.
+
+    Importing the app does no I/O: directories, tables, the connection pool
+    and the auth backends are all set up by the startup hooks. The schema is
+    managed with Alembic (``alembic upgrade head``); tables are only created
+    here for tests or with DB_CREATE_TABLES.
+    """
+    register_maintenance_tasks()
+    on_startup = [prepare_storage, open_stores]
+    if os.getenv("TESTING") or settings.db_create_tables:
+        on_startup.append(create_tables)
+    on_startup += [start_periodic_tasks, mail_queue.start, readiness.start]
+    
+    return Litestar(
+        route_handlers=[
+            root, healthz, readyz, auth_router, files_router,
+            *([MetricsController] if settings.metrics_enabled else []),
+        ],
+        plugins=[PydanticInitPlugin()],
+        cors_config=CORSConfig(
+                allow_origins=["*"],
+                allow_credentials=True,
+                allow_methods=["*"],
+                allow_headers=["*"],
+            ),
+        stores=stores,
+        middleware=[
+            *([metrics_config.middleware] if settings.metrics_enabled else []),
+            *([QueryProfilerMiddleware] if settings.query_profiling else []),
+        ],
+        dependencies={"db": Provide(get_db)},
+        on_startup=on_startup,
+        on_shutdown=[
+            readiness.drain, stop_periodic_tasks, mail_queue.stop, password_pool.shutdown, engine.dispose,
+            mark_worker_dead,
+        ],
+        debug=settings.debug
+    )
+
+
+# For ``uvicorn app.main:app``; ``uvicorn --factory app.main:create_app`` also works
+app = create_app()
 
 
 if __name__ == "__main__":
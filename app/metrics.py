@@ -0,0 +1,91 @@
+import os
+from litestar.plugins.prometheus import PrometheusConfig, PrometheusController, PrometheusMiddleware
+from litestar.types import Message, Receive, Scope, Send
+from prometheus_client import Counter, Gauge, Histogram, multiprocess
+from app.responses import ZERO_COPY_SEND_EXTENSION
+
+# Every metric lives in prometheus_client's default registry. With
+# PROMETHEUS_MULTIPROC_DIR set, each worker writes its samples to files in
+# that directory and /metrics aggregates all of them, whichever worker serves it.
+PREFIX = "file_sharing"
+
+REQUEST_BODY_BYTES = Counter(
+    f"{PREFIX}_request_body_bytes", "Request body bytes received", ["method", "path"]
+)
+RESPONSE_BODY_BYTES = Counter(
+    f"{PREFIX}_response_body_bytes", "Response body bytes sent", ["method", "path"]
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    f"{PREFIX}_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(f"{PREFIX}_db_pool_timeouts", "Checkouts that gave up waiting for a connection")
+DB_POOL_CHECKED_OUT = Gauge(
+    f"{PREFIX}_db_pool_checked_out", "Database connections currently checked out", multiprocess_mode="livesum"
+)
+DB_POOL_LEAKS = Counter(f"{PREFIX}_db_pool_leaks_reported", "Connections reported as possibly leaked")
+
+PASSWORD_HASH_SECONDS = Histogram(
+    f"{PREFIX}_password_hash_seconds", "Time spent in bcrypt", ["operation"]
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    f"{PREFIX}_password_hash_latency_seconds", "bcrypt time including the wait for a worker", ["operation"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    f"{PREFIX}_password_hash_rejected", "Password hashing requests refused with a 503"
+)
+JWT_SECONDS = Histogram(
+    f"{PREFIX}_jwt_seconds",
+    "Time spent encoding and decoding access tokens",
+    ["operation"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+DOWNLOAD_TOKENS_PURGED = Counter(f"{PREFIX}_download_tokens_purged", "Expired download tokens deleted")
+DOWNLOAD_TOKENS_ROWS = Gauge(
+    f"{PREFIX}_download_tokens_rows", "Rows in download_tokens at the last purge", multiprocess_mode="mostrecent"
+)
+
+
+class MetricsMiddleware(PrometheusMiddleware):
+    """Prometheus request metrics, plus request and response body bytes per route"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        labels = (scope.get("method", scope["type"]), scope.get("path_template", scope["path"]))
+
+        async def counting_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                REQUEST_BODY_BYTES.labels(*labels).inc(len(message.get("body", b"")))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            if message["type"] == "http.response.body":
+                RESPONSE_BODY_BYTES.labels(*labels).inc(len(message.get("body", b"")))
+            elif message["type"] == ZERO_COPY_SEND_EXTENSION:
+                RESPONSE_BODY_BYTES.labels(*labels).inc(message["count"])
+            await send(message)
+
+        await super().__call__(scope, counting_receive, counting_send)
+
+
+metrics_config = PrometheusConfig(
+    app_name="file-sharing",
+    prefix=PREFIX,
+    # Label by route template so ids and tokens in URLs don't explode cardinality
+    group_path=True,
+    exclude=["^/metrics$", "^/healthz$", "^/readyz$"],
+    middleware_class=MetricsMiddleware,
+)
+
+
+class MetricsController(PrometheusController):
+    path = "/metrics"
+
+
+async def mark_worker_dead() -> None:
+    """Shutdown hook dropping this worker's live gauges from the shared metrics"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+from datetime import datetime, UTC
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -26,6 +27,17 @@ class User(Base):
     files = relationship("File", back_populates="uploader")
 
 
+class Blob(Base):
+    """Stored file content, shared by every File with the same SHA-256"""
+    __tablename__ = "blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class File(Base):
     __tablename__ = "files"
     
@@ -35,12 +47,21 @@ class File(Base):
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)
     file_type = Column(String, nullable=False)
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)  # hex digest of the file contents
     uploader_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side as well so timestamps keep sub-second precision on
+    # every backend, which keyset pagination on (created_at, id) relies on
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), default=lambda: datetime.now(UTC))
     
     # Relationships
     uploader = relationship("User", back_populates="files")
     download_tokens = relationship("DownloadToken", back_populates="file")
+    
+    __table_args__ = (
+        # Keyset pagination of /files/list, optionally per uploader
+        Index("ix_files_created_at_id", "created_at", "id"),
+        Index("ix_files_uploader_created_at_id", "uploader_id", "created_at", "id"),
+    )
 
 
 class DownloadToken(Base):
@@ -56,4 +77,46 @@ class DownloadToken(Base):
     
     # Relationships
     file = relationship("File", back_populates="download_tokens")
-    client = relationship("User") 
\ No newline at end of file
+    client = relationship("User")
+    
+    __table_args__ = (
+        # Covers the one-statement token redemption in download_file
+        Index("ix_download_tokens_token_is_used_expires_at", "token", "is_used", "expires_at"),
+        # Lets the background purge find expired tokens without a full scan
+        Index("ix_download_tokens_expires_at", "expires_at"),
+    )
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    uploader_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    original_filename = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    total_size = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    chunk_count = Column(Integer, nullable=False)
+    is_completing = Column(Boolean, default=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    uploader = relationship("User")
+
+
+class VerificationToken(Base):
+    __tablename__ = "verification_tokens"
+    
+    email = Column(String, primary_key=True)
+    token = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class MaintenanceLease(Base):
+    """Which worker runs a shared maintenance task, until the lease expires"""
+    __tablename__ = "maintenance_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
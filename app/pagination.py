@@ -0,0 +1,64 @@
+import base64
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+from litestar.exceptions import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor pointing just after the given row"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises a 400 for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError as e:
+        raise HTTPException(detail="Invalid cursor", status_code=400) from e
+
+
+class CountCache:
+    """Small TTL cache for row counts, bounded by entry count"""
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[int]]) -> int:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        value = await compute()
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+async def estimated_table_rows(db: AsyncSession, table_name: str) -> Optional[int]:
+    """Planner row estimate for a table on Postgres, or None if unavailable"""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    estimate = await db.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table_name}
+    )
+    # reltuples is -1 for tables that have never been vacuumed or analyzed
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import math
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+from litestar.exceptions import HTTPException
+from app.config import settings
+from app.metrics import PASSWORD_HASH_LATENCY, PASSWORD_HASH_REJECTED, PASSWORD_HASH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(func: Callable, args: tuple) -> Tuple[Any, float]:
+    """Run ``func`` in a worker, returning its result and how long it ran"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+@dataclass
+class PasswordPoolStats:
+    """Counters for password hashing work"""
+    calls: int = 0
+    rejected: int = 0
+    total_hash_time: float = 0.0
+    max_hash_time: float = 0.0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def record(self, hash_time: float, latency: float) -> None:
+        self.calls += 1
+        self.total_hash_time += hash_time
+        self.max_hash_time = max(self.max_hash_time, hash_time)
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+
+class PasswordPool:
+    """Bounded executor for CPU-heavy password hashing.
+
+    bcrypt takes tens of milliseconds per call; running it here keeps the
+    event loop free for other requests. Once ``max_pending`` jobs are queued
+    or running, new work is refused with a 503 instead of piling up.
+    """
+
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.stats = PasswordPoolStats()
+        self._executor: Optional[Executor] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self.pending - self.workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        return self._executor
+
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        mean = self.stats.total_hash_time / self.stats.calls if self.stats.calls else 0.1
+        return max(1, math.ceil(self.pending * mean / self.workers))
+
+    async def run(self, func: Callable, *args) -> Any:
+        if self.pending >= self.max_pending:
+            self.stats.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            logger.debug("Password hashing pool saturated (%d pending), rejecting request", self.pending)
+            raise HTTPException(
+                detail="Server busy, please retry shortly",
+                status_code=503,
+                headers={"Retry-After": str(self._retry_after())}
+            )
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        submitted = time.perf_counter()
+        future = self._get_executor().submit(_timed_call, func, args)
+        # Release the slot when the work really finishes, even if the request
+        # waiting for it has gone away
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._release))
+
+        result, hash_time = await asyncio.wrap_future(future)
+        latency = time.perf_counter() - submitted
+        self.stats.record(hash_time, latency)
+        PASSWORD_HASH_SECONDS.labels(func.__name__).observe(hash_time)
+        PASSWORD_HASH_LATENCY.labels(func.__name__).observe(latency)
+        return result
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    def snapshot(self) -> dict:
+        """Current load together with the accumulated latency statistics"""
+        calls = self.stats.calls
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_depth": self.queue_depth,
+            "calls": calls,
+            "rejected": self.stats.rejected,
+            "mean_hash_time": self.stats.total_hash_time / calls if calls else 0.0,
+            "max_hash_time": self.stats.max_hash_time,
+            "mean_latency": self.stats.total_latency / calls if calls else 0.0,
+            "max_latency": self.stats.max_latency,
+        }
+
+    async def shutdown(self) -> None:
+        """Shutdown hook stopping the workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    settings.password_hash_pool, settings.password_hash_workers, settings.password_hash_max_pending
+)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from litestar.stores.base import Store
+from app.config import settings
+from app.stores import stores
+
+PRINCIPAL_STORE = "principals"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user behind a bearer token"""
+    id: int
+    email: str
+    username: str
+    user_type: str
+    is_verified: bool
+
+
+def _expires_in(token_expires_at: Optional[datetime]) -> float:
+    """Seconds an entry may live: the cache TTL, capped at the token's own expiry"""
+    ttl = float(settings.principal_cache_ttl)
+    if token_expires_at is not None:
+        ttl = min(ttl, token_expires_at.timestamp() - time.time())
+    return ttl
+
+
+class LocalPrincipalCache:
+    """In-process TTL+LRU cache of bearer token to principal, bounded by entry count.
+
+    ``stamp`` is taken before the user is loaded and passed back to ``set``;
+    an invalidation in between bumps the generation, so a principal read
+    before the change is never cached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._tokens_by_email: Dict[str, Set[str]] = {}
+        self._generation = 0
+
+    async def get(self, token: str) -> Optional[Principal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(token)
+            return None
+        self._entries.move_to_end(token)
+        return entry[1]
+
+    async def stamp(self, email: str) -> int:
+        return self._generation
+
+    async def set(
+        self, token: str, principal: Principal, token_expires_at: Optional[datetime], stamp: int
+    ) -> None:
+        expires_in = _expires_in(token_expires_at)
+        if stamp != self._generation or expires_in <= 0:
+            return
+        self._remove(token)
+        self._entries[token] = (time.monotonic() + expires_in, principal)
+        self._tokens_by_email.setdefault(principal.email, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate_user(self, email: str) -> None:
+        """Forget every cached token of a user; call after changing the user"""
+        self._generation += 1
+        for token in list(self._tokens_by_email.get(email, ())):
+            self._remove(token)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_email.get(entry[1].email)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_email[entry[1].email]
+
+
+class StorePrincipalCache:
+    """Principal cache kept in a shared store, so every worker sees the same entries.
+
+    Each entry records the user's epoch at the time the user was loaded;
+    invalidating a user moves the epoch on, which orphans their entries in
+    every worker at once.
+    """
+
+    def __init__(self, store: Store):
+        self.store = store
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        # Bearer tokens are credentials; don't keep them around in plain text
+        return "token:" + hashlib.sha256(token.encode()).hexdigest()
+
+    async def stamp(self, email: str) -> str:
+        epoch = await self.store.get(f"epoch:{email}")
+        return epoch.decode() if epoch else "0"
+
+    async def get(self, token: str) -> Optional[Principal]:
+        data = await self.store.get(self._token_key(token))
+        if data is None:
+            return None
+        entry = json.loads(data)
+        principal = Principal(**entry["principal"])
+        if entry["epoch"] != await self.stamp(principal.email):
+            return None
+        return principal
+
+    async def set(
+        self, token: str, principal: Principal, token_expires_at: Optional[datetime], stamp: str
+    ) -> None:
+        expires_in = int(_expires_in(token_expires_at))
+        if expires_in <= 0:
+            return
+        entry = json.dumps({"principal": asdict(principal), "epoch": stamp})
+        await self.store.set(self._token_key(token), entry, expires_in=expires_in)
+
+    async def invalidate_user(self, email: str) -> None:
+        """Orphan every cached token of a user; call after changing the user"""
+        # Entries never outlive the cache TTL, so the epoch only has to outlast
+        # entries written by lookups that were in flight when it moved on
+        await self.store.set(
+            f"epoch:{email}", f"{time.time_ns():x}", expires_in=2 * settings.principal_cache_ttl + 60
+        )
+
+
+def _create_principal_cache():
+    if settings.principal_cache_backend == "store":
+        return StorePrincipalCache(stores.get(PRINCIPAL_STORE))
+    return LocalPrincipalCache(settings.principal_cache_size)
+
+
+principal_cache = _create_principal_cache()
@@ -0,0 +1,152 @@
+from pydantic import BaseModel, EmailStr, ConfigDict
+from typing import Any, Dict, Optional, List
+from datetime import datetime
+from app.models import UserType
+
+
+# User Schemas
+class UserBase(BaseModel):
+    email: EmailStr
+    username: str
+
+
+class UserCreate(UserBase):
+    password: str
+    user_type: UserType
+
+
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+
+class UserResponse(UserBase):
+    id: int
+    user_type: str
+    is_verified: bool
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+
+
+class TokenData(BaseModel):
+    email: Optional[str] = None
+    user_type: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+# File Schemas
+class FileBase(BaseModel):
+    original_filename: str
+    file_size: int
+    file_type: str
+
+
+class FileCreate(FileBase):
+    filename: str
+    file_path: str
+    uploader_id: int
+
+
+class FileResponse(FileBase):
+    id: int
+    filename: str
+    sha256: Optional[str] = None
+    uploader_id: int
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FileListResponse(BaseModel):
+    files: List[FileResponse]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class SparseFileListResponse(BaseModel):
+    """File list restricted to the columns requested through ``fields``"""
+    files: List[Dict[str, Any]]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# Upload Session Schemas
+class UploadSessionCreate(BaseModel):
+    original_filename: str
+    total_size: int
+
+
+class UploadSessionResponse(BaseModel):
+    session_id: str
+    original_filename: str
+    total_size: int
+    chunk_size: int
+    chunk_count: int
+    received_chunks: List[int]
+    expires_at: datetime
+
+
+# Download Token Schemas
+class DownloadTokenCreate(BaseModel):
+    file_id: int
+    client_id: int
+    token: str
+    expires_at: datetime
+
+
+class DownloadTokenResponse(BaseModel):
+    download_link: str
+    message: str
+
+
+class DownloadLinkBatchRequest(BaseModel):
+    file_ids: List[int]
+
+
+class DownloadLinkBatchResponse(BaseModel):
+    links: Dict[int, str]
+    not_found: List[int] = []
+    message: str
+
+
+class DownloadBundleRequest(BaseModel):
+    tokens: List[str] = []
+    file_ids: List[int] = []
+
+
+# Email Verification
+class EmailVerification(BaseModel):
+    email: EmailStr
+    verification_token: str
+
+
+# Response Schemas
+class MessageResponse(BaseModel):
+    message: str
+
+
+class ErrorResponse(BaseModel):
+    detail: str
+
+
+def from_row(schema: type, row: Any) -> Any:
+    """Build a response type from an ORM object or result row"""
+    return schema.model_validate(row)
+
+
+def to_json(value: Any) -> bytes:
+    return value.model_dump_json().encode()
+
+
+__all__ = [
+    "UserBase", "UserCreate", "UserLogin", "UserResponse", "Token", "TokenData", "FileBase", "FileCreate",
+    "FileResponse", "FileListResponse", "SparseFileListResponse", "UploadSessionCreate", "UploadSessionResponse",
+    "DownloadTokenCreate", "DownloadTokenResponse", "DownloadLinkBatchRequest", "DownloadLinkBatchResponse",
+    "DownloadBundleRequest", "EmailVerification", "MessageResponse", "ErrorResponse", "from_row", "to_json",
+]
@@ -0,0 +1,106 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from litestar.datastructures import MutableScopeHeaders
+from litestar.middleware import AbstractMiddleware
+from litestar.types import Message, Receive, Scope, Send
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+# Separate logger so slow statements can be routed to their own file
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+# Longest statement text written to the logs
+_MAX_STATEMENT_LENGTH = 1000
+
+
+@dataclass
+class RequestProfile:
+    """Queries issued while handling one request"""
+    route: str
+    count: int = 0
+    total_time: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        self.statements[statement] += 1
+
+    def repeated(self) -> list:
+        """Statements run often enough in this request to look like an N+1 pattern"""
+        threshold = settings.query_n_plus_one_threshold
+        return [(statement, count) for statement, count in self.statements.items() if count >= threshold]
+
+    def summary(self) -> str:
+        return f"count={self.count}; time_ms={self.total_time * 1000:.2f}; repeated={len(self.repeated())}"
+
+
+# Profile of the request being handled; None outside requests
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > _MAX_STATEMENT_LENGTH:
+        return statement[:_MAX_STATEMENT_LENGTH] + "..."
+    return statement
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement, attribute it to the current request and log slow ones"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(statement, duration)
+        if duration >= settings.slow_query_threshold:
+            # Parameters are left out: they carry password hashes and tokens
+            slow_query_logger.warning(
+                "Slow query (%.3fs) in %s: %s",
+                duration, profile.route if profile else "background", _shorten(statement)
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+class QueryProfilerMiddleware(AbstractMiddleware):
+    """Profile the queries of each request, flag N+1 patterns and, in debug
+    mode, report a summary in the ``X-Query-Profile`` response header"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route_handler = scope.get("route_handler")
+        route = f"{scope.get('method', scope['type'])} {scope.get('path_template', scope['path'])}"
+        if route_handler is not None and route_handler.handler_name:
+            route = f"{route} ({route_handler.handler_name})"
+        profile = RequestProfile(route=route)
+        token = current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.debug:
+                MutableScopeHeaders.from_message(message)["x-query-profile"] = profile.summary()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            for statement, count in profile.repeated():
+                logger.warning(
+                    "Possible N+1 in %s: statement ran %d times: %s", route, count, _shorten(statement)
+                )
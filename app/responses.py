@@ -0,0 +1,372 @@
+import asyncio
+import secrets
+from datetime import datetime, UTC
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+from litestar import Request
+from litestar.background_tasks import BackgroundTask, BackgroundTasks
+from litestar.datastructures import Cookie
+from litestar.enums import ScopeType
+from litestar.exceptions import HTTPException
+from litestar.response import Response
+from litestar.response.streaming import ASGIStreamingResponse
+from litestar.types import Receive, Scope, Send
+from app.config import settings
+from app.storage_backends import storage
+
+# ASGI extension that lets the server hand the file descriptor to os.sendfile
+ZERO_COPY_SEND_EXTENSION = "http.response.zerocopysend"
+
+# Requests asking for more ranges than this are served the whole file
+MAX_RANGES = 16
+
+# (prefix bytes, file offset, byte count) for each piece of the response body
+BodyPart = Tuple[bytes, int, int]
+
+
+async def iter_file_parts(
+    file_path: str, parts: List[BodyPart], suffix: bytes, chunk_size: int
+) -> AsyncIterator[bytes]:
+    """Read the given slices of a stored file in fixed-size chunks"""
+    for prefix, offset, count in parts:
+        if prefix:
+            yield prefix
+        async for chunk in storage.read(file_path, offset, count, chunk_size):
+            yield chunk
+    if suffix:
+        yield suffix
+
+
+def content_disposition(filename: str, disposition_type: str = "attachment") -> str:
+    """Build a Content-Disposition header value that is safe for non-ASCII names"""
+    quoted_filename = quote(filename)
+    if quoted_filename == filename:
+        return f'{disposition_type}; filename="{filename}"'
+    return f"{disposition_type}; filename*=utf-8''{quoted_filename}"
+
+
+def parse_range_header(header: str, file_size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a ``Range`` header into sorted, merged ``(start, end)`` pairs.
+
+    ``end`` is inclusive. Returns None when the header should be ignored and
+    the whole file served, and raises a 416 when no range is satisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        start_text, sep, end_text = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start_text:
+                start = int(start_text)
+                end = int(end_text) if end_text else start
+                if start < 0 or end < start:
+                    return None
+                if not end_text:
+                    end = file_size - 1
+            else:
+                # Suffix range: the last N bytes
+                suffix_length = int(end_text)
+                if suffix_length <= 0:
+                    continue
+                start = max(file_size - suffix_length, 0)
+                end = file_size - 1
+        except ValueError:
+            return None
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    if not ranges:
+        raise HTTPException(
+            detail="Requested range not satisfiable",
+            status_code=416,
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    # Merge overlapping and adjacent ranges
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def etag_matches(header: str, etag: Optional[str], weak: bool) -> bool:
+    """Check an ``If-None-Match`` / ``If-Range`` style header against an ETag"""
+    if not etag:
+        return False
+    if header.strip() == "*":
+        return True
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            if not weak:
+                continue
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: Optional[str], last_modified_ts: Optional[float]) -> bool:
+    """Evaluate ``If-None-Match`` / ``If-Modified-Since`` for a conditional GET"""
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag, weak=True)
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since is None or last_modified_ts is None:
+        return False
+    try:
+        return int(last_modified_ts) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def may_reuse_download(request: Request) -> bool:
+    """Whether the headers could make ``reuses_download`` true, i.e. a spent link is worth looking up"""
+    headers = request.headers
+    return "If-None-Match" in headers or ("Range" in headers and "If-Range" in headers)
+
+
+def reuses_download(request: Request, etag: Optional[str], file_size: int) -> bool:
+    """Whether the response revalidates or resumes a download instead of sending the whole file.
+
+    True for a 304 (``If-None-Match`` matches) and for a partial 206 whose
+    ``If-Range`` matches the strong ETag. Only these may reuse a download
+    link that was already redeemed.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None and etag_matches(if_none_match, etag, weak=True):
+        return True
+
+    range_header = request.headers.get("Range")
+    if_range = (request.headers.get("If-Range") or "").strip()
+    if not range_header or not if_range.startswith('"') or not etag_matches(if_range, etag, weak=False):
+        return False
+    try:
+        ranges = parse_range_header(range_header, file_size)
+    except HTTPException:
+        return False
+    return bool(ranges) and ranges != [(0, file_size - 1)]
+
+
+class ASGIFileStreamResponse(ASGIStreamingResponse):
+    """Low-level response streaming a stored file, or slices of it.
+
+    When the file is on local disk and the server advertises the ASGI
+    zero-copy send extension, the file descriptor is handed over so the body
+    goes out through ``os.sendfile``; otherwise the file is read from the
+    storage backend in ``chunk_size`` pieces without blocking the event loop.
+    """
+
+    __slots__ = ("file_path", "parts", "suffix", "chunk_size", "zero_copy")
+
+    def __init__(
+        self,
+        *,
+        file_path: str,
+        file_size: int,
+        chunk_size: int,
+        ranges: Optional[List[Tuple[int, int]]] = None,
+        background: Optional[BackgroundTask | BackgroundTasks] = None,
+        cookies: Optional[Iterable[Cookie]] = None,
+        headers: Optional[dict] = None,
+        is_head_response: bool = False,
+        media_type: Optional[str] = None,
+        status_code: Optional[int] = None,
+    ) -> None:
+        headers = dict(headers or {})
+        media_type = media_type or "application/octet-stream"
+        suffix = b""
+
+        if not ranges:
+            parts = [(b"", 0, file_size)]
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            parts = [(b"", start, end - start + 1)]
+            headers["content-range"] = f"bytes {start}-{end}/{file_size}"
+        else:
+            boundary = secrets.token_hex(16)
+            parts = []
+            for index, (start, end) in enumerate(ranges):
+                separator = b"" if index == 0 else b"\r\n"
+                prefix = separator + (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{file_size}\r\n\r\n"
+                ).encode("latin-1")
+                parts.append((prefix, start, end - start + 1))
+            suffix = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            media_type = f"multipart/byteranges; boundary={boundary}"
+
+        content_length = sum(len(prefix) + count for prefix, _, count in parts) + len(suffix)
+        super().__init__(
+            iterator=iter_file_parts(file_path, parts, suffix, chunk_size),
+            background=background,
+            content_length=content_length,
+            cookies=cookies,
+            headers=headers,
+            is_head_response=is_head_response,
+            media_type=media_type,
+            status_code=status_code,
+        )
+        self.headers.setdefault("content-length", str(content_length))
+        self.file_path = file_path
+        self.parts = parts
+        self.suffix = suffix
+        self.chunk_size = chunk_size
+        self.zero_copy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.zero_copy = (
+            not self.is_head_response
+            and scope["type"] == ScopeType.HTTP
+            and ZERO_COPY_SEND_EXTENSION in (scope.get("extensions") or {})
+            and storage.local_path(self.file_path) is not None
+        )
+        await super().__call__(scope, receive, send)
+
+    async def send_body(self, send: Send, receive: Receive) -> None:
+        if not self.zero_copy:
+            await super().send_body(send=send, receive=receive)
+            return
+
+        f = await asyncio.to_thread(open, storage.local_path(self.file_path), "rb")
+        try:
+            for prefix, offset, count in self.parts:
+                if prefix:
+                    await send({"type": "http.response.body", "body": prefix, "more_body": True})
+                await send({
+                    "type": ZERO_COPY_SEND_EXTENSION,
+                    "file": f,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": True,
+                })
+        finally:
+            await asyncio.to_thread(f.close)
+        await send({"type": "http.response.body", "body": self.suffix, "more_body": False})
+
+
+class FileStream(Response):
+    """Response streaming a stored file, or byte ranges of it, as an attachment"""
+
+    __slots__ = ("file_path", "file_size", "filename", "chunk_size", "ranges")
+
+    def __init__(
+        self,
+        file_path: str,
+        file_size: int,
+        *,
+        filename: str,
+        chunk_size: Optional[int] = None,
+        ranges: Optional[List[Tuple[int, int]]] = None,
+        media_type: str = "application/octet-stream",
+        headers: Optional[dict] = None,
+        status_code: Optional[int] = None,
+    ) -> None:
+        super().__init__(
+            content=None,
+            media_type=media_type,
+            headers=headers,
+            status_code=status_code or (206 if ranges else 200)
+        )
+        self.file_path = file_path
+        self.file_size = file_size
+        self.filename = filename
+        self.chunk_size = chunk_size or settings.download_chunk_size
+        self.ranges = ranges
+        self.headers.setdefault("content-disposition", content_disposition(filename))
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    def to_asgi_response(
+        self,
+        app,
+        request: Request,
+        *,
+        background: Optional[BackgroundTask | BackgroundTasks] = None,
+        cookies: Optional[Iterable[Cookie]] = None,
+        headers: Optional[dict] = None,
+        is_head_response: bool = False,
+        media_type: Optional[str] = None,
+        status_code: Optional[int] = None,
+        **kwargs,
+    ) -> ASGIFileStreamResponse:
+        headers = {**headers, **self.headers} if headers is not None else self.headers
+        return ASGIFileStreamResponse(
+            file_path=self.file_path,
+            file_size=self.file_size,
+            chunk_size=self.chunk_size,
+            ranges=self.ranges,
+            background=self.background or background,
+            cookies=[*self.cookies, *(cookies or ())],
+            headers=headers,
+            is_head_response=is_head_response,
+            media_type=self.media_type or media_type,
+            status_code=self.status_code or status_code,
+        )
+
+
+def file_response(
+    request: Request,
+    file_path: str,
+    file_size: int,
+    *,
+    filename: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+) -> Response:
+    """Build the response for a file download honouring conditional and range headers.
+
+    Returns a 304 when ``If-None-Match`` matches, a 206 for satisfiable
+    ``Range`` requests (unless ``If-Range`` no longer matches) and the whole
+    file otherwise.
+    """
+    headers = {"accept-ranges": "bytes"}
+    if etag:
+        headers["etag"] = etag
+    last_modified_ts = None
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=UTC)
+        last_modified_ts = int(last_modified.timestamp())
+        headers["last-modified"] = formatdate(last_modified_ts, usegmt=True)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None and etag_matches(if_none_match, etag, weak=True):
+        return Response(content=None, status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request.headers.get("Range")
+    if range_header:
+        if_range = request.headers.get("If-Range")
+        if if_range is None or _if_range_matches(if_range, etag, last_modified_ts):
+            ranges = parse_range_header(range_header, file_size)
+
+    return FileStream(file_path, file_size, filename=filename, ranges=ranges, headers=headers)
+
+
+def _if_range_matches(if_range: str, etag: Optional[str], last_modified_ts: Optional[int]) -> bool:
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # If-Range requires a strong comparison
+        return etag_matches(if_range, etag, weak=False)
+    if last_modified_ts is None:
+        return False
+    try:
+        return int(parsedate_to_datetime(if_range).timestamp()) == last_modified_ts
+    except (TypeError, ValueError):
+        return False
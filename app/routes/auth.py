@@ -1,29 +1,25 @@
-from datetime import datetime, timedelta, UTC
 from litestar import Router, post, get, Request
 from litestar.exceptions import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import User
 from app.schemas import UserCreate, UserLogin, UserResponse, Token, MessageResponse
-from app.auth import get_password_hash, verify_password, create_access_token, generate_secure_token
+from app.auth import get_password_hash_async, verify_password_async, create_access_token, generate_secure_token
 from app.email_service import email_service
-from app.dependencies import get_db_session
+from app.principal_cache import principal_cache
+from app.verification_tokens import verification_tokens
 
 
 @post("/signup")
-async def signup(request: Request) -> dict:
+async def signup(request: Request, data: UserCreate, db: AsyncSession) -> dict:
     """Client user signup with email verification"""
-    # Parse request body
-    body = await request.json()
-    user_data = UserCreate(**body)
-    
-    if user_data.user_type != "client":
+    if data.user_type != "client":
         raise HTTPException(detail="Only client users can sign up through this endpoint", status_code=400)
     
-    db = get_db_session(request)
-    
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    existing_user = await db.scalar(select(User).where(
+        (User.email == data.email) | (User.username == data.username)
+    ))
     
     if existing_user:
         raise HTTPException(detail="User with this email or username already exists", status_code=400)
@@ -32,33 +28,25 @@ async def signup(request: Request) -> dict:
     verification_token = generate_secure_token()
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(data.password)
     user = User(
-        email=user_data.email,
-        username=user_data.username,
+        email=data.email,
+        username=data.username,
         hashed_password=hashed_password,
-        user_type=user_data.user_type,
+        user_type=data.user_type,
         is_verified=False
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    # Store verification token (shared by all workers, expires on its own)
+    await verification_tokens.set(db, user.email, verification_token)
+    await db.commit()
+    await db.refresh(user)
     
     # Send verification email
     base_url = str(request.base_url).rstrip('/')
     email_service.send_verification_email(user.email, verification_token, base_url)
     
-    # Store verification token
-    # For simplicity, we'll store it in memory
-    if not hasattr(request.app.state, 'verification_tokens'):
-        request.app.state.verification_tokens = {}
-    
-    request.app.state.verification_tokens[user.email] = {
-        'token': verification_token,
-        'expires_at': datetime.now(UTC) + timedelta(hours=24)
-    }
-    
     return {
         "message": "User created successfully. Please check your email for verification.",
         "user_id": user.id
@@ -66,16 +54,10 @@ async def signup(request: Request) -> dict:
 
 
 @post("/login")
-async def login(request: Request) -> Token:
+async def login(data: UserLogin, db: AsyncSession) -> Token:
     """User login"""
-    # Parse request body
-    body = await request.json()
-    user_data = UserLogin(**body)
-    
-    db = get_db_session(request)
-    
-    user = db.query(User).filter(User.email == user_data.email).first()
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == data.email))
+    if not user or not await verify_password_async(data.password, user.hashed_password):
         raise HTTPException(detail="Incorrect email or password", status_code=401)
     
     # For client users, check if email is verified
@@ -91,11 +73,9 @@ async def login(request: Request) -> Token:
 
 
 @get("/verify-email")
-async def verify_email(email: str, token: str, request: Request) -> MessageResponse:
+async def verify_email(email: str, token: str, db: AsyncSession) -> MessageResponse:
     """Verify user email"""
-    db = get_db_session(request)
-    
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         raise HTTPException(detail="User not found", status_code=404)
     
@@ -103,65 +83,53 @@ async def verify_email(email: str, token: str, request: Request) -> MessageRespo
         return MessageResponse(message="Email already verified")
     
     # Check verification token
-    if not hasattr(request.app.state, 'verification_tokens'):
+    stored_data = await verification_tokens.get(db, email)
+    if not stored_data or not stored_data.matches(token):
         raise HTTPException(detail="Invalid verification token", status_code=400)
     
-    stored_data = request.app.state.verification_tokens.get(email)
-    if not stored_data:
-        raise HTTPException(detail="Invalid verification token", status_code=400)
-    
-    if stored_data['token'] != token:
-        raise HTTPException(detail="Invalid verification token", status_code=400)
-    
-    if datetime.now(UTC) > stored_data['expires_at']:
+    if stored_data.expired:
         # Clean up expired token
-        del request.app.state.verification_tokens[email]
+        await verification_tokens.delete(db, email)
+        await db.commit()
         raise HTTPException(detail="Verification token expired", status_code=400)
     
-    # Mark user as verified
+    # Mark user as verified and clean up token
     user.is_verified = True
-    db.commit()
-    
-    # Clean up token
-    del request.app.state.verification_tokens[email]
+    await verification_tokens.delete(db, email)
+    await db.commit()
+    await principal_cache.invalidate_user(user.email)
     
     return MessageResponse(message="Email verified successfully")
 
 
 # Ops user creation (for development/testing)
 @post("/create-ops-user")
-async def create_ops_user(request: Request) -> dict:
+async def create_ops_user(data: UserCreate, db: AsyncSession) -> dict:
     """Create Ops user (for development/testing purposes)"""
-    # Parse request body
-    body = await request.json()
-    user_data = UserCreate(**body)
-    
-    if user_data.user_type != "ops":
+    if data.user_type != "ops":
         raise HTTPException(detail="This endpoint is for creating Ops users only", status_code=400)
     
-    db = get_db_session(request)
-    
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    existing_user = await db.scalar(select(User).where(
+        (User.email == data.email) | (User.username == data.username)
+    ))
     
     if existing_user:
         raise HTTPException(detail="User with this email or username already exists", status_code=400)
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(data.password)
     user = User(
-        email=user_data.email,
-        username=user_data.username,
+        email=data.email,
+        username=data.username,
         hashed_password=hashed_password,
-        user_type=user_data.user_type,
+        user_type=data.user_type,
         is_verified=True  # Ops users are automatically verified
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return {
         "message": "Ops user created successfully",
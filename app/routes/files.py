@@ -1,184 +1,690 @@
+import asyncio
 import os
 import uuid
 from datetime import datetime, timedelta, UTC
-from typing import List
-from litestar import Router, post, get, Request
+from email.utils import formatdate
+from typing import Annotated, Dict, List, Literal, Optional, Union
+from litestar import Router, post, get, put, delete, Request, Response
 from litestar.exceptions import HTTPException
-from litestar.datastructures import UploadFile
-from sqlalchemy.orm import Session
-from app.models import User, File, DownloadToken
-from app.schemas import FileResponse, FileListResponse, DownloadTokenResponse, MessageResponse
+from litestar.enums import MediaType
+from litestar.params import Parameter
+from litestar.response import Stream
+from sqlalchemy import delete as sql_delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import File, DownloadToken, UploadSession
+from app.schemas import (
+    FileResponse, FileListResponse, SparseFileListResponse, DownloadTokenResponse, MessageResponse,
+    UploadSessionCreate, UploadSessionResponse, DownloadLinkBatchRequest, DownloadLinkBatchResponse,
+    DownloadBundleRequest, from_row, to_json
+)
 from app.auth import generate_secure_token
 from app.config import settings
-from app.dependencies import get_current_ops_user, get_current_client_user, get_db_session
+from app.storage import receive_upload
+from app.pagination import CountCache, decode_cursor, encode_cursor, estimated_table_rows
+from app.blobstore import blob_path, discard_blob, release_blob
+from app.storage_backends import storage
+from app.upload_sessions import assemble_chunks, discard_session_files, receive_chunk, received_chunks
+from app.responses import content_disposition, file_response, is_not_modified, may_reuse_download, reuses_download
+from app.list_cache import (
+    bump_files_version, get_cached_list, get_files_version, list_cache_key, set_cached_list,
+    version_timestamp
+)
+from app.dependencies import get_current_ops_user, get_current_client_user
+from app.principal_cache import Principal
+from app.signed_links import create_signed_token, is_signed_token, replay_set, verify_signed_token
+from app.zipstream import ZipEntry, ZipStream, unique_names
 
 
-@post("/upload")
+@post("/upload", request_max_body_size=None)
 async def upload_file(
-    request: Request
+    request: Request,
+    db: AsyncSession
 ) -> MessageResponse:
     """Upload file (Ops users only)"""
     # Get current user
-    current_user = get_current_ops_user(request)
+    current_user = await get_current_ops_user(request, db)
+    # Return the connection to the pool while the body streams in
+    await db.commit()
     
-    # Parse multipart form data
-    form = await request.form()
-    file = form.get("file")
+    # Stream the multipart body into the blob store; extension and size
+    # limits are enforced while streaming and duplicate content is shared
+    try:
+        stored = await receive_upload(request, db)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(detail=f"Failed to save file: {str(e)}", status_code=500) from e
+    
+    # Save file record to database
+    file_record = File(
+        filename=stored.filename,
+        original_filename=stored.original_filename,
+        file_path=stored.file_path,
+        file_size=stored.file_size,
+        file_type=stored.file_type,
+        sha256=stored.sha256,
+        uploader_id=current_user.id
+    )
     
-    if not file or not hasattr(file, 'filename'):
-        raise HTTPException(detail="No file provided", status_code=400)
+    db.add(file_record)
+    await db.commit()
+    await db.refresh(file_record)
+    await bump_files_version()
     
-    # Check file extension
-    file_extension = os.path.splitext(file.filename)[1].lower()
+    return MessageResponse(message=f"File uploaded successfully. File ID: {file_record.id}")
+
+
+@post("/uploads")
+async def create_upload_session(
+    request: Request,
+    data: UploadSessionCreate,
+    db: AsyncSession
+) -> UploadSessionResponse:
+    """Start a resumable chunked upload (Ops users only)"""
+    current_user = await get_current_ops_user(request, db)
+    
+    # Check file extension and size up front
+    file_extension = os.path.splitext(data.original_filename)[1].lower()
     if file_extension not in settings.allowed_extensions:
         raise HTTPException(
             detail=f"Only {', '.join(settings.allowed_extensions)} files are allowed",
             status_code=400
         )
+    if data.total_size <= 0:
+        raise HTTPException(detail="total_size must be positive", status_code=400)
+    if data.total_size > settings.max_file_size:
+        raise HTTPException(
+            detail=f"File size exceeds maximum limit of {settings.max_file_size} bytes",
+            status_code=413
+        )
+    
+    chunk_size = settings.upload_session_chunk_size
+    upload_session = UploadSession(
+        id=uuid.uuid4().hex,
+        uploader_id=current_user.id,
+        original_filename=data.original_filename,
+        file_type=file_extension,
+        total_size=data.total_size,
+        chunk_size=chunk_size,
+        chunk_count=-(-data.total_size // chunk_size),
+        expires_at=datetime.now(UTC) + timedelta(hours=settings.upload_session_expire_hours)
+    )
+    
+    db.add(upload_session)
+    await db.commit()
+    
+    return _upload_session_response(upload_session, [])
+
+
+@get("/uploads/{session_id:str}")
+async def get_upload_session(
+    session_id: str,
+    request: Request,
+    db: AsyncSession
+) -> UploadSessionResponse:
+    """Show which chunks of an upload session have been received (Ops users only)"""
+    current_user = await get_current_ops_user(request, db)
+    upload_session = await _get_upload_session(db, session_id, current_user)
+    
+    return _upload_session_response(upload_session, await received_chunks(session_id))
+
+
+@put("/uploads/{session_id:str}/chunks/{index:int}", request_max_body_size=None)
+async def upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    db: AsyncSession
+) -> MessageResponse:
+    """Upload one chunk of an upload session; chunks may arrive in any order (Ops users only)"""
+    current_user = await get_current_ops_user(request, db)
+    upload_session = await _get_upload_session(db, session_id, current_user)
+    if upload_session.is_completing:
+        raise HTTPException(detail="Upload session is being completed", status_code=409)
+    # Return the connection to the pool while the body streams in
+    await db.commit()
+    
+    size = await receive_chunk(request, upload_session, index)
+    
+    return MessageResponse(message=f"Chunk {index} received ({size} bytes)")
+
+
+@post("/uploads/{session_id:str}/complete")
+async def complete_upload_session(
+    session_id: str,
+    request: Request,
+    db: AsyncSession
+) -> MessageResponse:
+    """Assemble a fully received upload session into a file (Ops users only)"""
+    current_user = await get_current_ops_user(request, db)
+    upload_session = await _get_upload_session(db, session_id, current_user)
     
-    # Check file size
-    # if file.size > settings.max_file_size:
-    #     raise HTTPException(
-    #         detail=f"File size exceeds maximum limit of {settings.max_file_size} bytes",
-    #         status_code=400
-    #     )
+    missing = sorted(set(range(upload_session.chunk_count)) - set(await received_chunks(session_id)))
+    if missing:
+        raise HTTPException(
+            detail=f"Upload incomplete, missing chunks: {missing[:20]}",
+            status_code=409
+        )
     
-    # Generate unique filename
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = os.path.join(settings.upload_dir, unique_filename)
+    # Only one request may finalize a session
+    claimed = await db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session_id, UploadSession.is_completing == False)
+        .values(is_completing=True)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if not claimed.rowcount:
+        raise HTTPException(detail="Upload session is already being completed", status_code=409)
     
-    # Save file
     try:
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        stored = await assemble_chunks(upload_session, db)
     except Exception as e:
-        raise HTTPException(detail=f"Failed to save file: {str(e)}", status_code=500)
+        await db.rollback()
+        await db.execute(
+            update(UploadSession)
+            .where(UploadSession.id == session_id)
+            .values(is_completing=False)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        raise HTTPException(detail=f"Failed to save file: {str(e)}", status_code=500) from e
     
-    # Save file record to database
-    db = get_db_session(request)
     file_record = File(
-        filename=unique_filename,
-        original_filename=file.filename,
-        file_path=file_path,
-        file_size=0,
-        file_type=file_extension,
+        filename=stored.filename,
+        original_filename=stored.original_filename,
+        file_path=stored.file_path,
+        file_size=stored.file_size,
+        file_type=stored.file_type,
+        sha256=stored.sha256,
         uploader_id=current_user.id
     )
-    
     db.add(file_record)
-    db.commit()
-    db.refresh(file_record)
+    await db.delete(upload_session)
+    await db.commit()
+    await db.refresh(file_record)
+    await bump_files_version()
+    
+    await discard_session_files(session_id)
     
-    return MessageResponse(message=f"File uploaded successfully. File ID: {file_record.id}", status_code=201)
+    return MessageResponse(message=f"File uploaded successfully. File ID: {file_record.id}")
+
+
+@delete("/uploads/{session_id:str}")
+async def abort_upload_session(
+    session_id: str,
+    request: Request,
+    db: AsyncSession
+) -> None:
+    """Abort an upload session and discard its chunks (Ops users only)"""
+    current_user = await get_current_ops_user(request, db)
+    upload_session = await _get_upload_session(db, session_id, current_user)
+    
+    await db.delete(upload_session)
+    await db.commit()
+    await discard_session_files(session_id)
+
+
+async def _get_upload_session(db: AsyncSession, session_id: str, user: Principal) -> UploadSession:
+    upload_session = await db.scalar(select(UploadSession).where(
+        UploadSession.id == session_id,
+        UploadSession.uploader_id == user.id,
+        UploadSession.expires_at > datetime.now(UTC)
+    ))
+    if not upload_session:
+        raise HTTPException(detail="Upload session not found", status_code=404)
+    return upload_session
+
+
+def _upload_session_response(upload_session: UploadSession, received: List[int]) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        session_id=upload_session.id,
+        original_filename=upload_session.original_filename,
+        total_size=upload_session.total_size,
+        chunk_size=upload_session.chunk_size,
+        chunk_count=upload_session.chunk_count,
+        received_chunks=received,
+        expires_at=upload_session.expires_at
+    )
+
+
+# Columns /files/list can return, selectable through ``fields``
+FILE_LIST_COLUMNS = {
+    "id": File.id,
+    "filename": File.filename,
+    "original_filename": File.original_filename,
+    "file_size": File.file_size,
+    "file_type": File.file_type,
+    "sha256": File.sha256,
+    "uploader_id": File.uploader_id,
+    "created_at": File.created_at,
+}
+
+file_count_cache = CountCache(ttl=settings.list_count_cache_ttl)
 
 
 @get("/list")
 async def list_files(
-    request: Request
-) -> FileListResponse:
-    """List all uploaded files (Client users only)"""
-    db = get_db_session(request)
+    request: Request,
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: Annotated[int, Parameter(ge=1, le=settings.list_max_limit)] = settings.list_default_limit,
+    file_type: Optional[str] = None,
+    uploader_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    count: Literal["estimated", "exact", "none"] = "estimated"
+) -> Response[Union[FileListResponse, SparseFileListResponse]]:
+    """List uploaded files, newest first, one page at a time
+    
+    Pages are keyset-paginated on (created_at, id): pass ``next_cursor`` from
+    the previous page as ``cursor``. ``fields`` restricts the returned
+    columns, and ``count`` picks an estimated (cached), exact or no total.
+    
+    Responses are cached per query string until the next upload or delete,
+    and carry an ETag so unchanged polls get a 304 without a database query.
+    """
+    version = await get_files_version()
+    cache_key, etag = list_cache_key(version, request.url.query)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(version_timestamp(version), usegmt=True),
+        "Cache-Control": "no-cache"
+    }
+    if is_not_modified(request, etag, version_timestamp(version)):
+        return Response(content=None, status_code=304, headers=headers)
+    
+    body = await get_cached_list(cache_key)
+    if body is None:
+        file_list = await _query_file_list(
+            db, version, cursor, limit, file_type, uploader_id,
+            created_after, created_before, fields, count
+        )
+        body = to_json(file_list)
+        await set_cached_list(cache_key, body)
+    
+    return Response(content=body, media_type=MediaType.JSON, headers=headers)
+
+
+async def _query_file_list(
+    db: AsyncSession,
+    version: str,
+    cursor: Optional[str],
+    limit: int,
+    file_type: Optional[str],
+    uploader_id: Optional[int],
+    created_after: Optional[datetime],
+    created_before: Optional[datetime],
+    fields: Optional[str],
+    count: str
+) -> Union[FileListResponse, SparseFileListResponse]:
+    if fields:
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in FILE_LIST_COLUMNS]
+        if unknown:
+            raise HTTPException(detail=f"Unknown fields: {', '.join(unknown)}", status_code=400)
+    else:
+        requested = list(FILE_LIST_COLUMNS)
+    
+    filters = []
+    if file_type:
+        file_type = file_type.lower()
+        filters.append(File.file_type == (file_type if file_type.startswith(".") else f".{file_type}"))
+    if uploader_id is not None:
+        filters.append(File.uploader_id == uploader_id)
+    if created_after is not None:
+        filters.append(File.created_at >= created_after)
+    if created_before is not None:
+        filters.append(File.created_at < created_before)
+    
+    # Only select the requested columns, plus the keyset columns
+    selected = dict.fromkeys([*requested, "created_at", "id"])
+    query = select(*(FILE_LIST_COLUMNS[name] for name in selected)).where(*filters)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(tuple_(File.created_at, File.id) < (cursor_created_at, cursor_id))
+    
+    rows = (await db.execute(
+        query.order_by(File.created_at.desc(), File.id.desc()).limit(limit + 1)
+    )).all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    rows = rows[:limit]
     
-    files = db.query(File).order_by(File.created_at.desc()).all()
+    total = None
+    if count == "exact":
+        total = await db.scalar(select(func.count(File.id)).where(*filters))
+    elif count == "estimated":
+        total = await _estimated_file_count(db, filters, (version, file_type, uploader_id, created_after, created_before))
     
-    file_responses = []
-    for file in files:
-        file_responses.append(FileResponse(
-            id=file.id,
-            filename=file.filename,
-            original_filename=file.original_filename,
-            file_size=file.file_size,
-            file_type=file.file_type,
-            uploader_id=file.uploader_id,
-            created_at=file.created_at
-        ))
+    if fields:
+        return SparseFileListResponse(
+            files=[{name: getattr(row, name) for name in requested} for row in rows],
+            total=total,
+            next_cursor=next_cursor
+        )
+    
+    return FileListResponse(
+        files=[from_row(FileResponse, row) for row in rows],
+        total=total,
+        next_cursor=next_cursor
+    )
+
+
+async def _estimated_file_count(db: AsyncSession, filters: list, key: tuple) -> int:
+    if not filters:
+        estimate = await estimated_table_rows(db, File.__tablename__)
+        if estimate is not None:
+            return estimate
+    return await file_count_cache.get_or_compute(
+        key, lambda: db.scalar(select(func.count(File.id)).where(*filters))
+    )
+
+
+@delete("/{file_id:int}")
+async def delete_file(
+    file_id: int,
+    request: Request,
+    db: AsyncSession
+) -> None:
+    """Delete a file (Ops users only)
+    
+    The stored content is only removed once no other file refers to it.
+    """
+    await get_current_ops_user(request, db)
+    file = await db.get(File, file_id)
+    if not file:
+        raise HTTPException(detail="File not found", status_code=404)
+    
+    await db.execute(
+        sql_delete(DownloadToken)
+        .where(DownloadToken.file_id == file_id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.delete(file)
+    await db.flush()
+    
+    content_addressed = file.sha256 and file.file_path == blob_path(file.sha256)
+    released_path = await release_blob(db, file.sha256) if content_addressed else None
+    await db.commit()
     
-    return FileListResponse(files=file_responses, total=len(file_responses))
+    # Stored content is only removed once the rows no longer refer to it
+    if released_path:
+        await discard_blob(db, file.sha256, released_path)
+    elif not content_addressed:
+        # Files stored before content addressing own their path
+        await storage.delete(file.file_path)
+    await bump_files_version()
 
 
 @get("/download/{file_id:int}")
 async def get_download_link(
     file_id: int,
-    request: Request
+    request: Request,
+    db: AsyncSession
 ) -> DownloadTokenResponse:
     """Get secure download link for a file (Client users only)"""
     # Get current user
-    current_user = get_current_client_user(request)
-    
-    db = get_db_session(request)
+    current_user = await get_current_client_user(request, db)
     
     # Check if file exists
-    file = db.query(File).filter(File.id == file_id).first()
+    file = await db.get(File, file_id)
     if not file:
         raise HTTPException(detail="File not found", status_code=404)
     
-    # Generate secure download token
-    download_token = generate_secure_token()
+    tokens = await _issue_download_tokens(db, [file_id], current_user.id)
     
-    # Create download token record
-    token_record = DownloadToken(
-        token=download_token,
-        file_id=file_id,
-        client_id=current_user.id,
-        expires_at=datetime.now(UTC) + timedelta(hours=1)  # Token expires in 1 hour
+    return DownloadTokenResponse(
+        download_link=_download_link(request, tokens[file_id]),
+        message="success"
     )
+
+
+@post("/download-links")
+async def get_download_links(
+    request: Request,
+    data: DownloadLinkBatchRequest,
+    db: AsyncSession
+) -> DownloadLinkBatchResponse:
+    """Get secure download links for several files at once (Client users only)
     
-    db.add(token_record)
-    db.commit()
+    Unknown ids are reported in ``not_found`` instead of failing the batch.
+    """
+    current_user = await get_current_client_user(request, db)
     
-    # Create download link
-    base_url = str(request.base_url).rstrip('/')
-    download_link = f"{base_url}/files/download-file/{download_token}"
+    file_ids = list(dict.fromkeys(data.file_ids))
+    if len(file_ids) > settings.download_link_batch_max:
+        raise HTTPException(
+            detail=f"At most {settings.download_link_batch_max} files per batch",
+            status_code=400
+        )
     
-    return DownloadTokenResponse(
-        download_link=download_link,
+    # Validate every id with a single query
+    found = set()
+    if file_ids:
+        found = set((await db.scalars(select(File.id).where(File.id.in_(file_ids)))).all())
+    tokens = await _issue_download_tokens(db, [i for i in file_ids if i in found], current_user.id)
+    
+    return DownloadLinkBatchResponse(
+        links={file_id: _download_link(request, token) for file_id, token in tokens.items()},
+        not_found=[i for i in file_ids if i not in found],
         message="success"
     )
 
 
+async def _issue_download_tokens(db: AsyncSession, file_ids: List[int], client_id: int) -> Dict[int, str]:
+    """Create a download token per file, all in one transaction (or none at all when signed)"""
+    expires_at = datetime.now(UTC) + timedelta(minutes=settings.download_link_expire_minutes)
+    if settings.download_link_mode == "signed":
+        # Self-contained signed tokens; nothing is written
+        return {file_id: create_signed_token(file_id, client_id, expires_at) for file_id in file_ids}
+    
+    # Generate secure download tokens
+    tokens = {file_id: generate_secure_token() for file_id in file_ids}
+    if tokens:
+        await db.execute(insert(DownloadToken), [
+            {"token": token, "file_id": file_id, "client_id": client_id, "expires_at": expires_at}
+            for file_id, token in tokens.items()
+        ])
+        await db.commit()
+    return tokens
+
+
+def _download_link(request: Request, token: str) -> str:
+    base_url = str(request.base_url).rstrip('/')
+    return f"{base_url}/files/download-file/{token}"
+
+
+# File columns a download needs
+DOWNLOAD_FILE_COLUMNS = (File.file_path, File.original_filename, File.sha256, File.created_at)
+
+
+async def _redeem_download_token(db: AsyncSession, token: str, now: datetime, allow_used: bool):
+    """Mark an unexpired token as used and return its file's download columns.
+    
+    Unless ``allow_used`` is set the token must not have been used yet. The
+    check and the update are one statement, so concurrent requests can never
+    both redeem the same token. The caller commits.
+    """
+    redeem = (
+        update(DownloadToken)
+        .where(DownloadToken.token == token, DownloadToken.expires_at > now)
+        .values(is_used=True)
+        .execution_options(synchronize_session=False)
+    )
+    if not allow_used:
+        redeem = redeem.where(DownloadToken.is_used == False)
+    if db.bind.dialect.name == "postgresql":
+        return (await db.execute(
+            redeem.where(File.id == DownloadToken.file_id).returning(*DOWNLOAD_FILE_COLUMNS)
+        )).first()
+    
+    # SQLite can't return columns of the joined table, so look the file up
+    # separately within the same transaction
+    file_id = await db.scalar(redeem.returning(DownloadToken.file_id))
+    if file_id is None:
+        return None
+    return (await db.execute(select(*DOWNLOAD_FILE_COLUMNS).where(File.id == file_id))).first()
+
+
 @get("/download-file/{token:str}")
 async def download_file(
     token: str,
-    request: Request
-) -> bytes:
-    """Download file using secure token"""
-    db = get_db_session(request)
-    
-    # Find download token
-    token_record = db.query(DownloadToken).filter(
-        DownloadToken.token == token,
-        DownloadToken.is_used == False,
-        DownloadToken.expires_at > datetime.now(UTC)
-    ).first()
-    
-    if not token_record:
-        raise HTTPException(detail="Invalid or expired download token", status_code=400)
-    
-    # Get file
-    file = db.query(File).filter(File.id == token_record.file_id).first()
+    request: Request,
+    db: AsyncSession
+) -> Response:
+    """Download file using secure token
+    
+    The first download redeems the token. Until it expires, an already
+    redeemed token is only accepted for a 304 revalidation or a partial 206
+    whose If-Range matches the file's ETag, so interrupted transfers can
+    resume and clients can fetch segments in parallel; any response sending
+    the whole file needs an unused token.
+    """
+    now = datetime.now(UTC)
+    signed_link = None
+    reused = False
+    if is_signed_token(token):
+        # Signed links are checked without touching the database
+        signed_link = verify_signed_token(token)
+        file = signed_link and (await db.execute(
+            select(*DOWNLOAD_FILE_COLUMNS).where(File.id == signed_link.file_id)
+        )).first()
+    else:
+        file = await _redeem_download_token(db, token, now, allow_used=False)
+        if not file and may_reuse_download(request):
+            # Possibly resuming with a token that was already redeemed
+            file = await _redeem_download_token(db, token, now, allow_used=True)
+            reused = True
+    
+    invalid_token = HTTPException(detail="Invalid or expired download token", status_code=400)
     if not file:
+        raise invalid_token
+    
+    # Check if file exists in storage; if not, roll back so the token stays usable
+    file_size = await storage.size(file.file_path)
+    if file_size is None:
+        await db.rollback()
+        raise HTTPException(detail="File not found on server", status_code=404)
+    
+    etag = f'"{file.sha256}"' if file.sha256 else None
+    if signed_link is not None:
+        reused = not await replay_set.claim(signed_link.nonce, signed_link.expires_at)
+    if reused and not reuses_download(request, etag, file_size):
+        await db.rollback()
+        raise invalid_token
+    if signed_link is None:
+        await db.commit()
+    
+    # Stream the file (or the requested ranges) instead of loading it into memory
+    return file_response(
+        request,
+        file.file_path,
+        file_size,
+        filename=file.original_filename,
+        etag=etag,
+        last_modified=file.created_at
+    )
+
+@post("/bundle", status_code=200)
+async def download_bundle(
+    request: Request,
+    data: DownloadBundleRequest,
+    db: AsyncSession
+) -> Response:
+    """Download several files as a single ZIP archive
+    
+    Files are named by download tokens, each redeemed as by a single
+    download, and/or by id (Client users only). Either every file is served
+    or nothing is redeemed. The archive is streamed as it is built.
+    """
+    tokens = list(dict.fromkeys(data.tokens))
+    if not tokens and not data.file_ids:
+        raise HTTPException(detail="No files requested", status_code=400)
+    if len(tokens) + len(data.file_ids) > settings.download_bundle_max_files:
+        raise HTTPException(
+            detail=f"At most {settings.download_bundle_max_files} files per bundle",
+            status_code=400
+        )
+    if data.file_ids:
+        await get_current_client_user(request, db)
+    
+    invalid_token = HTTPException(detail="Invalid or expired download token", status_code=400)
+    signed_links = {}
+    for token in tokens:
+        if is_signed_token(token):
+            signed_links[token] = verify_signed_token(token)
+            if signed_links[token] is None:
+                raise invalid_token
+    
+    # Redeem all plain tokens with one statement
+    redeemed = {}
+    plain_tokens = [token for token in tokens if token not in signed_links]
+    if plain_tokens:
+        redeemed = dict((await db.execute(
+            update(DownloadToken)
+            .where(
+                DownloadToken.token.in_(plain_tokens),
+                DownloadToken.is_used == False,
+                DownloadToken.expires_at > datetime.now(UTC)
+            )
+            .values(is_used=True)
+            .execution_options(synchronize_session=False)
+            .returning(DownloadToken.token, DownloadToken.file_id)
+        )).all())
+        if len(redeemed) < len(plain_tokens):
+            await db.rollback()
+            raise invalid_token
+    
+    file_ids = [signed_links[token].file_id if token in signed_links else redeemed[token] for token in tokens]
+    file_ids = list(dict.fromkeys(file_ids + data.file_ids))
+    files = {
+        row.id: row
+        for row in await db.execute(select(File.id, *DOWNLOAD_FILE_COLUMNS).where(File.id.in_(file_ids)))
+    }
+    if len(files) < len(file_ids):
+        await db.rollback()
         raise HTTPException(detail="File not found", status_code=404)
     
-    # Check if file exists on disk
-    if not os.path.exists(file.file_path):
+    # Sizes go into the headers, so every file must be in storage before the
+    # first byte is sent; if one is missing, roll back so the tokens stay usable
+    sizes = await asyncio.gather(*(storage.size(files[file_id].file_path) for file_id in file_ids))
+    if None in sizes:
+        await db.rollback()
         raise HTTPException(detail="File not found on server", status_code=404)
+    names = unique_names(files[file_id].original_filename for file_id in file_ids)
+    entries = [
+        ZipEntry(name, files[file_id].file_path, size, files[file_id].created_at)
+        for file_id, name, size in zip(file_ids, names, sizes, strict=True)
+    ]
     
-    # Mark token as used
-    token_record.is_used = True
-    db.commit()
+    claimed = []
+    for signed_link in signed_links.values():
+        if not await replay_set.claim(signed_link.nonce, signed_link.expires_at):
+            for nonce in claimed:
+                await replay_set.release(nonce)
+            await db.rollback()
+            raise invalid_token
+        claimed.append(signed_link.nonce)
+    await db.commit()
     
-    # Read and return file
-    try:
-        with open(file.file_path, "rb") as f:
-            content = f.read()
-        
-        # Set response headers for file download
-        request.response.headers["Content-Disposition"] = f"attachment; filename={file.original_filename}"
-        request.response.headers["Content-Type"] = "application/octet-stream"
-        
-        return content
-    except Exception as e:
-        raise HTTPException(detail=f"Failed to read file: {str(e)}", status_code=500) from e
+    archive = ZipStream(entries, settings.download_chunk_size)
+    return Stream(
+        archive.iterate(),
+        media_type="application/zip",
+        headers={
+            "content-disposition": content_disposition("files.zip"),
+            "content-length": str(archive.size)
+        }
+    )
+
 
-files_router = Router(path="/files", route_handlers=[upload_file, list_files, get_download_link, download_file])
+files_router = Router(
+    path="/files",
+    route_handlers=[
+        upload_file, create_upload_session, get_upload_session, upload_chunk,
+        complete_upload_session, abort_upload_session,
+        list_files, delete_file, get_download_link, get_download_links, download_file,
+        download_bundle
+    ]
+)
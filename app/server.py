@@ -0,0 +1,171 @@
+import asyncio
+import glob
+import inspect
+import logging
+import os
+import tempfile
+from importlib.util import find_spec
+from typing import Dict, Optional
+import uvicorn
+from app.config import settings
+
+# Production entry point (``python -m app.server`` or the ``file-sharing``
+# script): WORKERS uvicorn processes, one per CPU by default, behind uvicorn's
+# supervisor, which replaces workers that exit. Before they start, the
+# per-worker pool is sized so all workers together stay under the database's
+# max_connections. SIGTERM drains each worker (see app.health) and then lets
+# in-flight requests finish for up to GRACEFUL_TIMEOUT seconds.
+# ``python -m app.main`` remains the development server.
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL's default, used when the server cannot be asked
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on, which respects container CPU sets"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+async def _server_connection_limit(url: str) -> int:
+    """Connections available to the app's role: max_connections less the superuser reserve"""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.database import async_database_url
+
+    engine = create_async_engine(async_database_url(url))
+    try:
+        async with engine.connect() as conn:
+            max_connections = int(await conn.scalar(text("SHOW max_connections")))
+            reserved = int(await conn.scalar(text("SHOW superuser_reserved_connections")))
+    finally:
+        await engine.dispose()
+    return max_connections - reserved
+
+
+def database_connection_limit() -> Optional[int]:
+    """Connections the database accepts from the app, or None if it has no such limit"""
+    if os.getenv("TESTING") or not settings.database_url.startswith(("postgresql", "postgres://")):
+        return None
+    if settings.db_max_connections:
+        return settings.db_max_connections
+    try:
+        return asyncio.run(asyncio.wait_for(_server_connection_limit(settings.database_url), 10))
+    except Exception as e:
+        logger.warning(
+            "Could not read max_connections from the database (%s); assuming %d, set DB_MAX_CONNECTIONS to override",
+            e, DEFAULT_MAX_CONNECTIONS,
+        )
+        return DEFAULT_MAX_CONNECTIONS
+
+
+def size_workers(workers: int) -> Dict[str, str]:
+    """Per-worker settings, as environment variables inherited by the workers.
+
+    Each worker may hold up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+    When all workers together could exceed the database's limit (less
+    DB_RESERVED_CONNECTIONS for migrations, admin and monitoring), the pool
+    is shrunk to fit, overflow first. Unless PASSWORD_HASH_WORKERS is set,
+    the CPUs are split between the workers' bcrypt threads.
+    """
+    overrides = {}
+    limit = database_connection_limit()
+    if limit is not None:
+        budget = (limit - settings.db_reserved_connections) // workers
+        if budget < 1:
+            raise SystemExit(
+                f"{workers} workers cannot share {limit} database connections with "
+                f"{settings.db_reserved_connections} reserved; lower WORKERS or DB_RESERVED_CONNECTIONS"
+            )
+        pool_size = min(settings.db_pool_size, budget)
+        max_overflow = min(settings.db_max_overflow, budget - pool_size)
+        if (pool_size, max_overflow) != (settings.db_pool_size, settings.db_max_overflow):
+            logger.warning(
+                "%d workers x (pool %d + overflow %d) exceeds %d usable database connections; "
+                "using pool %d + overflow %d per worker",
+                workers, settings.db_pool_size, settings.db_max_overflow,
+                limit - settings.db_reserved_connections, pool_size, max_overflow,
+            )
+        overrides["DB_POOL_SIZE"] = str(pool_size)
+        overrides["DB_MAX_OVERFLOW"] = str(max_overflow)
+        logger.info(
+            "Database connections: up to %d of %d (%d workers x %d)",
+            workers * (pool_size + max_overflow), limit, workers, pool_size + max_overflow,
+        )
+    if "password_hash_workers" not in settings.model_fields_set:
+        overrides["PASSWORD_HASH_WORKERS"] = str(max(1, cpu_count() // workers))
+    return overrides
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Give the workers a shared, empty PROMETHEUS_MULTIPROC_DIR so /metrics reports totals"""
+    if not settings.metrics_enabled:
+        return
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # Samples left by a previous run would be counted again
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+    elif workers > 1:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="file-sharing-metrics-")
+
+
+def recycling_options(workers: int) -> dict:
+    """uvicorn options replacing each worker after WORKER_MAX_REQUESTS requests"""
+    if not settings.worker_max_requests:
+        return {}
+    if workers == 1:
+        # Without a supervisor nothing would start a replacement
+        logger.warning("Worker recycling needs more than one worker, WORKER_MAX_REQUESTS is ignored")
+        return {}
+    options = {"limit_max_requests": settings.worker_max_requests}
+    if "limit_max_requests_jitter" in inspect.signature(uvicorn.Config).parameters:
+        options["limit_max_requests_jitter"] = settings.worker_max_requests_jitter
+    elif settings.worker_max_requests_jitter:
+        logger.warning("This uvicorn has no request limit jitter; workers started together are replaced together")
+    return options
+
+
+async def _create_tables() -> None:
+    import app.models  # noqa: F401  (registers the tables)
+    from app.database import create_tables, engine
+
+    await create_tables()
+    await engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(asctime)s - %(name)s - %(message)s")
+    workers = settings.workers or cpu_count()
+    os.environ.update(size_workers(workers))
+    prepare_metrics_dir(workers)
+    if os.getenv("TESTING") or settings.db_create_tables:
+        # Once here, so the workers do not race to create the same tables
+        asyncio.run(_create_tables())
+
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    if (loop, http) != ("uvloop", "httptools"):
+        logger.warning("uvloop or httptools is not installed, using the %s loop and %s parser", loop, http)
+
+    logger.info("Starting %d workers on %s:%d (%s, %s)", workers, settings.host, settings.port, loop, http)
+    uvicorn.run(
+        "app.main:create_app",
+        factory=True,
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        lifespan="on",
+        timeout_graceful_shutdown=settings.graceful_timeout,
+        proxy_headers=True,
+        **recycling_options(workers),
+    )
+
+
+if __name__ == "__main__":
+    main()
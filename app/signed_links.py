@@ -0,0 +1,148 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import time
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Dict, Optional
+from app.config import settings
+
+# file id, client id, expiry (epoch seconds), nonce
+_PAYLOAD = struct.Struct(">QQI8s")
+_SIGNATURE_SIZE = 16
+
+# Separate key for download links, so a link signature can never be
+# mistaken for any other MAC made with the secret key
+_link_key = hmac.new(settings.secret_key.encode(), b"download-link", hashlib.sha256).digest()
+
+
+@dataclass(frozen=True)
+class SignedLink:
+    file_id: int
+    client_id: int
+    expires_at: datetime
+    nonce: str
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_link_key, payload, hashlib.sha256).digest()[:_SIGNATURE_SIZE]
+
+
+def is_signed_token(token: str) -> bool:
+    """Signed tokens contain a '.', which random download tokens never do"""
+    return "." in token
+
+
+def create_signed_token(file_id: int, client_id: int, expires_at: datetime) -> str:
+    """Compact self-contained download token: base64url(payload).base64url(hmac)"""
+    payload = _PAYLOAD.pack(file_id, client_id, int(expires_at.timestamp()), secrets.token_bytes(8))
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def verify_signed_token(token: str) -> Optional[SignedLink]:
+    """Decode a signed token, or return None if it is malformed, forged or expired"""
+    try:
+        encoded_payload, encoded_signature = token.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+        file_id, client_id, expires, nonce = _PAYLOAD.unpack(payload)
+    except (ValueError, struct.error):
+        return None
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    if expires <= time.time():
+        return None
+
+    return SignedLink(
+        file_id=file_id,
+        client_id=client_id,
+        expires_at=datetime.fromtimestamp(expires, UTC),
+        nonce=nonce.hex()
+    )
+
+
+class ReplaySet:
+    """Expiring set of redeemed link nonces.
+
+    Entries only need to live until their link expires, so the set stays as
+    small as the number of links redeemed within one link lifetime. With the
+    file backend every worker on the host shares the set, and claims are
+    atomic across processes (O_EXCL creates).
+    """
+
+    def __init__(self, directory: Optional[Path]):
+        self.directory = directory
+        self._memory: Dict[str, float] = {}
+
+    async def claim(self, nonce: str, expires_at: datetime) -> bool:
+        """Record a nonce as redeemed; False if it already was"""
+        if self.directory is None:
+            if self._memory.get(nonce, 0) > time.time():
+                return False
+            self._memory[nonce] = expires_at.timestamp()
+            return True
+        return await asyncio.to_thread(self._claim_file, nonce, expires_at.timestamp())
+
+    def _claim_file(self, nonce: str, expires: float) -> bool:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / nonce
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return False
+        os.close(fd)
+        # The entry's mtime records when it may be forgotten
+        os.utime(path, (expires, expires))
+        return True
+
+    async def release(self, nonce: str) -> None:
+        """Undo a claim whose download never started"""
+        if self.directory is None:
+            self._memory.pop(nonce, None)
+            return
+        try:
+            await asyncio.to_thread(os.remove, self.directory / nonce)
+        except FileNotFoundError:
+            pass
+
+    async def delete_expired(self) -> None:
+        now = time.time()
+        if self.directory is None:
+            for nonce in [n for n, expires in self._memory.items() if expires <= now]:
+                del self._memory[nonce]
+            return
+        await asyncio.to_thread(self._delete_expired_files, now)
+
+    def _delete_expired_files(self, now: float) -> None:
+        if not self.directory.is_dir():
+            return
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime <= now:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+replay_set = ReplaySet(
+    Path(settings.store_dir) / "download-replay" if settings.store_backend == "file" else None
+)
+
+
+async def delete_expired_replay_entries() -> None:
+    """Forget nonces of links that have expired anyway"""
+    await replay_set.delete_expired()
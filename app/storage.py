@@ -0,0 +1,161 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+import aiofiles
+import aiofiles.os
+from litestar import Request
+from litestar.exceptions import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from multipart import MultipartError, MultipartSegment, PushMultipartParser, parse_options_header
+from app.config import settings
+from app.blobstore import acquire_blob
+
+
+@dataclass
+class StoredFile:
+    """A file that has been streamed to disk"""
+    filename: str
+    original_filename: str
+    file_path: str
+    file_size: int
+    file_type: str
+    sha256: str
+
+
+class StreamingFileWriter:
+    """Write a byte stream to a temporary file through a bounded buffer.
+
+    The data is hashed and counted as it arrives, and the temporary file is
+    only moved into place by ``commit`` (or handed to the blob store) so
+    readers never see partial files.
+    """
+
+    def __init__(self, directory: str, max_size: int, buffer_size: int):
+        self.temp_path = os.path.join(directory, f".{uuid.uuid4()}.part")
+        self.max_size = max_size
+        self.buffer_size = buffer_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file = None
+
+    async def open(self) -> "StreamingFileWriter":
+        self._file = await aiofiles.open(self.temp_path, "wb")
+        return self
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    async def write(self, data: bytes) -> None:
+        """Append data, flushing to disk whenever the buffer fills up"""
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise HTTPException(
+                detail=f"File size exceeds maximum limit of {self.max_size} bytes",
+                status_code=413
+            )
+        self._hash.update(data)
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            await self._file.write(bytes(self._buffer))
+            self._buffer.clear()
+
+    async def close(self) -> None:
+        """Flush any buffered data and close the temporary file"""
+        if self._file is not None:
+            try:
+                await self._flush()
+            finally:
+                await self._file.close()
+                self._file = None
+
+    async def commit(self, final_path: str) -> None:
+        """Atomically move the temporary file to its final location"""
+        await self.close()
+        await aiofiles.os.replace(self.temp_path, final_path)
+
+    async def abort(self) -> None:
+        """Close and remove the temporary file"""
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        try:
+            await aiofiles.os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+async def receive_upload(request: Request, db: AsyncSession, field_name: str = "file") -> StoredFile:
+    """Stream the file part of a multipart request into the blob store.
+
+    The body is parsed incrementally, so memory use stays bounded by
+    ``settings.upload_chunk_size`` no matter how large the file is. Content
+    that is already stored is deduplicated; the caller commits ``db``.
+    """
+    content_type, options = parse_options_header(request.headers.get("Content-Type", ""))
+    if content_type != "multipart/form-data" or not options.get("boundary"):
+        raise HTTPException(detail="No file provided", status_code=400)
+
+    parser = PushMultipartParser(options["boundary"], max_segment_count=16)
+    writer: Optional[StreamingFileWriter] = None
+    original_filename = None
+    file_extension = None
+    receiving = False
+
+    try:
+        async for chunk in request.stream():
+            for event in parser.parse(chunk):
+                if isinstance(event, MultipartSegment):
+                    receiving = False
+                    if event.name != field_name or not event.filename or writer is not None:
+                        continue
+
+                    # Check file extension before accepting any file data
+                    original_filename = event.filename
+                    file_extension = os.path.splitext(original_filename)[1].lower()
+                    if file_extension not in settings.allowed_extensions:
+                        raise HTTPException(
+                            detail=f"Only {', '.join(settings.allowed_extensions)} files are allowed",
+                            status_code=400
+                        )
+
+                    writer = await StreamingFileWriter(
+                        settings.upload_dir, settings.max_file_size, settings.upload_chunk_size
+                    ).open()
+                    receiving = True
+                elif event is None:
+                    receiving = False
+                elif receiving:
+                    await writer.write(event)
+
+        if not parser.closed:
+            raise HTTPException(detail="Incomplete multipart body", status_code=400)
+        if writer is None:
+            raise HTTPException(detail="No file provided", status_code=400)
+
+        await writer.close()
+        blob = await acquire_blob(db, writer.sha256, writer.size, writer.temp_path)
+    except MultipartError as e:
+        if writer is not None:
+            await writer.abort()
+        raise HTTPException(detail=f"Malformed multipart body: {e}", status_code=400) from e
+    except BaseException:
+        if writer is not None:
+            await writer.abort()
+        raise
+
+    return StoredFile(
+        filename=f"{blob.sha256}{file_extension}",
+        original_filename=original_filename,
+        file_path=blob.file_path,
+        file_size=writer.size,
+        file_type=file_extension,
+        sha256=blob.sha256
+    )
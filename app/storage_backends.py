@@ -0,0 +1,150 @@
+import asyncio
+import os
+from functools import cached_property
+from typing import AsyncIterator, Optional
+import aiofiles
+import aiofiles.os
+from app.config import settings
+
+
+def _shard(sha256: str) -> str:
+    """Relative location of a blob, fanned out over two levels of hex-prefix directories"""
+    return "/".join(("blobs", sha256[:2], sha256[2:4], sha256))
+
+
+class LocalStorage:
+    """Blobs as files under ``root``, sharded by digest so no directory grows huge"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def blob_location(self, sha256: str) -> str:
+        return os.path.join(self.root, *_shard(sha256).split("/"))
+
+    def local_path(self, location: str) -> Optional[str]:
+        return location
+
+    async def put(self, source_path: str, location: str) -> None:
+        """Move a finished local file into the store"""
+        await aiofiles.os.makedirs(os.path.dirname(location), exist_ok=True)
+        await aiofiles.os.replace(source_path, location)
+
+    async def size(self, location: str) -> Optional[int]:
+        """Size of a stored file, or None if it is missing"""
+        try:
+            return (await aiofiles.os.stat(location)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, location: str) -> None:
+        try:
+            await aiofiles.os.remove(location)
+        except FileNotFoundError:
+            pass
+
+    async def read(self, location: str, offset: int, count: int, chunk_size: int) -> AsyncIterator[bytes]:
+        """Stream ``count`` bytes starting at ``offset``"""
+        async with aiofiles.open(location, "rb") as f:
+            await f.seek(offset)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class S3Storage:
+    """Blobs as objects in an S3-compatible bucket.
+
+    boto3 is only imported, and the client created, on first use. Its calls
+    block, so they run in threads; reads are ranged GETs consumed chunk by
+    chunk and writes are managed multipart uploads, so neither holds a
+    whole object in memory.
+    """
+
+    def __init__(self, bucket: str, prefix: str = ""):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    @cached_property
+    def client(self):
+        import boto3
+
+        return boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url,
+            region_name=settings.s3_region,
+            aws_access_key_id=settings.s3_access_key_id,
+            aws_secret_access_key=settings.s3_secret_access_key,
+        )
+
+    @cached_property
+    def transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=settings.s3_multipart_chunk_size,
+            multipart_chunksize=settings.s3_multipart_chunk_size,
+        )
+
+    def blob_location(self, sha256: str) -> str:
+        return self.prefix + _shard(sha256)
+
+    def local_path(self, location: str) -> Optional[str]:
+        return None
+
+    async def put(self, source_path: str, location: str) -> None:
+        """Upload a finished local file, then remove it"""
+        await asyncio.to_thread(
+            self.client.upload_file, source_path, self.bucket, location, Config=self.transfer_config
+        )
+        await aiofiles.os.remove(source_path)
+
+    async def size(self, location: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=location)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["ContentLength"]
+
+    async def delete(self, location: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=location)
+
+    async def read(self, location: str, offset: int, count: int, chunk_size: int) -> AsyncIterator[bytes]:
+        if count <= 0:
+            return
+        response = await asyncio.to_thread(
+            self.client.get_object,
+            Bucket=self.bucket,
+            Key=location,
+            Range=f"bytes={offset}-{offset + count - 1}",
+        )
+        body = response["Body"]
+        try:
+            while chunk := await asyncio.to_thread(body.read, chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+
+def _create_storage():
+    if settings.storage_backend == "s3":
+        return S3Storage(settings.s3_bucket, settings.s3_prefix)
+    return LocalStorage(settings.upload_dir)
+
+
+storage = _create_storage()
+
+
+async def prepare_storage() -> None:
+    """Startup hook creating ``upload_dir``, where uploads are staged for either
+    backend, and the S3 client, so the first request does not pay for boto3"""
+    await aiofiles.os.makedirs(settings.upload_dir, exist_ok=True)
+    if isinstance(storage, S3Storage):
+        await asyncio.to_thread(lambda: (storage.client, storage.transfer_config))
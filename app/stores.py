@@ -0,0 +1,51 @@
+from pathlib import Path
+from typing import Set
+from litestar.stores.base import Store
+from litestar.stores.file import FileStore
+from litestar.stores.memory import MemoryStore
+from litestar.stores.registry import StoreRegistry
+from app.config import settings
+
+# Names of the stores created so far, for periodic cleanup
+_store_names: Set[str] = set()
+
+
+def _store_factory(name: str) -> Store:
+    """Create the store backing ``name``.
+
+    The file backend lives on local disk so every worker process on the host
+    shares it; the memory backend is per process. Nothing touches the disk
+    here: ``open_stores`` creates the directories on startup.
+    """
+    _store_names.add(name)
+    if settings.store_backend == "file":
+        return FileStore(Path(settings.store_dir) / name, create_directories=True)
+    return MemoryStore()
+
+
+# Named key/value stores shared by the app, also reachable as ``app.stores``
+stores = StoreRegistry(default_factory=_store_factory)
+
+
+async def open_stores() -> None:
+    """Startup hook creating the directories of the file stores created so far.
+
+    Stores created later only need their own directory, which FileStore
+    makes on first write, so ``store_dir`` itself is created here too.
+    """
+    if settings.store_backend != "file":
+        return
+    Path(settings.store_dir).mkdir(parents=True, exist_ok=True)
+    for name in sorted(_store_names):
+        async with stores.get(name):
+            pass
+
+
+async def delete_expired_entries() -> None:
+    """Drop expired entries from every store created so far"""
+    for name in sorted(_store_names):
+        store = stores.get(name)
+        if isinstance(store, FileStore) and not await store.path.is_dir():
+            continue  # nothing written yet
+        if isinstance(store, (FileStore, MemoryStore)):
+            await store.delete_expired()
@@ -0,0 +1,160 @@
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Optional
+import msgspec
+from app.models import UserType
+
+# msgspec equivalents of the types in app.pydantic_schemas, exported through
+# app.schemas with SCHEMA_BACKEND=msgspec. Litestar decodes and encodes them
+# natively, without a Pydantic validation pass, which matters most for large
+# file lists.
+
+# Close to what EmailStr accepts, without email-validator's deliverability rules
+EmailStr = Annotated[str, msgspec.Meta(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=320)]
+
+
+# User Schemas
+class UserBase(msgspec.Struct):
+    email: EmailStr
+    username: str
+
+
+class UserCreate(UserBase):
+    password: str
+    user_type: UserType
+
+
+class UserLogin(msgspec.Struct):
+    email: EmailStr
+    password: str
+
+
+class UserResponse(UserBase):
+    id: int
+    user_type: str
+    is_verified: bool
+    created_at: datetime
+
+
+class Token(msgspec.Struct):
+    access_token: str
+    token_type: str
+
+
+class TokenData(msgspec.Struct):
+    email: Optional[str] = None
+    user_type: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+
+# File Schemas
+class FileBase(msgspec.Struct):
+    original_filename: str
+    file_size: int
+    file_type: str
+
+
+class FileCreate(FileBase):
+    filename: str
+    file_path: str
+    uploader_id: int
+
+
+# kw_only keeps the field order, and so the JSON, the same as the Pydantic model
+class FileResponse(FileBase, kw_only=True):
+    id: int
+    filename: str
+    sha256: Optional[str] = None
+    uploader_id: int
+    created_at: datetime
+
+
+class FileListResponse(msgspec.Struct):
+    files: List[FileResponse]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class SparseFileListResponse(msgspec.Struct):
+    """File list restricted to the columns requested through ``fields``"""
+    files: List[Dict[str, Any]]
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+# Upload Session Schemas
+class UploadSessionCreate(msgspec.Struct):
+    original_filename: str
+    total_size: int
+
+
+class UploadSessionResponse(msgspec.Struct):
+    session_id: str
+    original_filename: str
+    total_size: int
+    chunk_size: int
+    chunk_count: int
+    received_chunks: List[int]
+    expires_at: datetime
+
+
+# Download Token Schemas
+class DownloadTokenCreate(msgspec.Struct):
+    file_id: int
+    client_id: int
+    token: str
+    expires_at: datetime
+
+
+class DownloadTokenResponse(msgspec.Struct):
+    download_link: str
+    message: str
+
+
+class DownloadLinkBatchRequest(msgspec.Struct):
+    file_ids: List[int]
+
+
+class DownloadLinkBatchResponse(msgspec.Struct, kw_only=True):
+    links: Dict[int, str]
+    not_found: List[int] = []
+    message: str
+
+
+class DownloadBundleRequest(msgspec.Struct):
+    tokens: List[str] = []
+    file_ids: List[int] = []
+
+
+# Email Verification
+class EmailVerification(msgspec.Struct):
+    email: EmailStr
+    verification_token: str
+
+
+# Response Schemas
+class MessageResponse(msgspec.Struct):
+    message: str
+
+
+class ErrorResponse(msgspec.Struct):
+    detail: str
+
+
+def from_row(schema: type, row: Any) -> Any:
+    """Build a response type from an ORM object or result row"""
+    return msgspec.convert(row, schema, from_attributes=True)
+
+
+_encoder = msgspec.json.Encoder()
+
+
+def to_json(value: Any) -> bytes:
+    return _encoder.encode(value)
+
+
+__all__ = [
+    "UserBase", "UserCreate", "UserLogin", "UserResponse", "Token", "TokenData", "FileBase", "FileCreate",
+    "FileResponse", "FileListResponse", "SparseFileListResponse", "UploadSessionCreate", "UploadSessionResponse",
+    "DownloadTokenCreate", "DownloadTokenResponse", "DownloadLinkBatchRequest", "DownloadLinkBatchResponse",
+    "DownloadBundleRequest", "EmailVerification", "MessageResponse", "ErrorResponse", "from_row", "to_json",
+]
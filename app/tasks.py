@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+from app.leases import acquire_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run a coroutine function every ``interval`` seconds while the app is running.
+
+    With a ``lease`` name, only the worker holding that lease runs it. The
+    holder renews the lease on every run, for two intervals, so when it dies
+    another worker takes over within that time.
+    """
+
+    def __init__(
+        self, name: str, interval: float, func: Callable[[], Awaitable[None]], lease: Optional[str] = None
+    ):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.lease = lease
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if self.lease is None or await acquire_lease(self.lease, 2 * self.interval):
+                    await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lease is not None:
+            try:
+                await release_lease(self.lease)
+            except Exception:
+                logger.exception("Could not release the lease of periodic task %s", self.name)
+
+
+# Tasks started and stopped with the application lifecycle
+periodic_tasks: List[PeriodicTask] = []
+
+
+def register_periodic_task(
+    name: str, interval: float, func: Callable[[], Awaitable[None]], lease: Optional[str] = None
+) -> PeriodicTask:
+    """Register a coroutine function to run periodically for the app's lifetime.
+
+    Registering a name again replaces the earlier task, so building the app
+    more than once does not run its maintenance twice. Work on state shared
+    between workers takes a ``lease``, so one worker does it instead of all.
+    """
+    task = PeriodicTask(name, interval, func, lease)
+    periodic_tasks[:] = [t for t in periodic_tasks if t.name != name]
+    periodic_tasks.append(task)
+    return task
+
+
+async def start_periodic_tasks() -> None:
+    """Startup hook starting every registered periodic task"""
+    for task in periodic_tasks:
+        task.start()
+
+
+async def stop_periodic_tasks() -> None:
+    """Shutdown hook cancelling every registered periodic task"""
+    for task in periodic_tasks:
+        await task.stop()
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+from sqlalchemy import delete as sql_delete, func, select, text
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.metrics import DOWNLOAD_TOKENS_PURGED, DOWNLOAD_TOKENS_ROWS
+from app.models import DownloadToken
+from app.pagination import estimated_table_rows
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenPurgeStats:
+    """Counters describing the download token purge"""
+    runs: int = 0
+    rows_purged: int = 0
+    last_run_rows: int = 0
+    last_run_duration: float = 0.0
+    vacuums: int = 0
+    table_rows: Optional[int] = None
+    table_bytes: Optional[int] = None
+
+
+purge_stats = TokenPurgeStats()
+
+
+async def _purge_batch(cutoff: datetime) -> int:
+    """Delete one batch of expired tokens in its own short transaction"""
+    async with SessionLocal() as db:
+        batch = (
+            select(DownloadToken.id)
+            .where(DownloadToken.expires_at < cutoff)
+            .limit(settings.download_token_purge_batch_size)
+        )
+        if db.bind.dialect.name == "postgresql":
+            # Rows another transaction has locked are left for the next run
+            batch = batch.with_for_update(skip_locked=True)
+        result = await db.execute(
+            sql_delete(DownloadToken)
+            .where(DownloadToken.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+
+async def _vacuum() -> None:
+    """Let Postgres reuse the space of purged rows and index entries right away"""
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text(f"VACUUM (ANALYZE) {DownloadToken.__tablename__}"))
+    purge_stats.vacuums += 1
+
+
+async def _measure_table() -> None:
+    async with SessionLocal() as db:
+        table = DownloadToken.__tablename__
+        if db.bind.dialect.name == "postgresql":
+            purge_stats.table_rows = await estimated_table_rows(db, table)
+            purge_stats.table_bytes = await db.scalar(
+                text("SELECT pg_total_relation_size(to_regclass(:table))"), {"table": table}
+            )
+        else:
+            purge_stats.table_rows = await db.scalar(select(func.count()).select_from(DownloadToken))
+
+
+async def purge_download_tokens() -> None:
+    """Delete download tokens that expired more than the retention window ago.
+
+    Tokens stay usable for resumed downloads until they expire, so used ones
+    are kept until then too. Rows go in small batches with a pause in
+    between, so the purge never holds many locks or starves requests of
+    connections.
+    """
+    started = time.perf_counter()
+    cutoff = datetime.now(UTC) - timedelta(minutes=settings.download_token_retention_minutes)
+    purged = 0
+    while True:
+        deleted = await _purge_batch(cutoff)
+        purged += deleted
+        if deleted < settings.download_token_purge_batch_size:
+            break
+        await asyncio.sleep(settings.download_token_purge_pause)
+
+    threshold = settings.download_token_vacuum_threshold
+    if threshold and purged >= threshold and engine.dialect.name == "postgresql":
+        await _vacuum()
+    await _measure_table()
+
+    purge_stats.runs += 1
+    purge_stats.rows_purged += purged
+    purge_stats.last_run_rows = purged
+    purge_stats.last_run_duration = time.perf_counter() - started
+    DOWNLOAD_TOKENS_PURGED.inc(purged)
+    if purge_stats.table_rows is not None:
+        DOWNLOAD_TOKENS_ROWS.set(purge_stats.table_rows)
+    if purged:
+        logger.info(
+            "Purged %d expired download tokens in %.2fs (%s rows left)",
+            purged, purge_stats.last_run_duration, purge_stats.table_rows
+        )
+
+
+def purge_snapshot() -> dict:
+    """Purge counters together with the last measured table size"""
+    return {
+        "runs": purge_stats.runs,
+        "rows_purged": purge_stats.rows_purged,
+        "last_run_rows": purge_stats.last_run_rows,
+        "last_run_duration": purge_stats.last_run_duration,
+        "vacuums": purge_stats.vacuums,
+        "table_rows": purge_stats.table_rows,
+        "table_bytes": purge_stats.table_bytes,
+    }
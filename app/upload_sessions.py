@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import shutil
+from datetime import datetime, UTC
+from typing import List
+import aiofiles
+import aiofiles.os
+from litestar import Request
+from litestar.exceptions import HTTPException
+from sqlalchemy import delete as sql_delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.blobstore import acquire_blob
+from app.config import settings
+from app.database import SessionLocal
+from app.models import UploadSession
+from app.storage import StoredFile, StreamingFileWriter
+
+logger = logging.getLogger(__name__)
+
+
+def session_dir(session_id: str) -> str:
+    """Directory holding the received chunks of an upload session"""
+    return os.path.join(settings.upload_dir, ".sessions", session_id)
+
+
+def expected_chunk_size(upload_session: UploadSession, index: int) -> int:
+    """Size in bytes that chunk ``index`` of the session must have"""
+    if index == upload_session.chunk_count - 1:
+        return upload_session.total_size - upload_session.chunk_size * index
+    return upload_session.chunk_size
+
+
+async def received_chunks(session_id: str) -> List[int]:
+    """Indexes of the chunks that have been fully received"""
+    try:
+        names = await aiofiles.os.listdir(session_dir(session_id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name) for name in names if name.isdigit())
+
+
+async def receive_chunk(request: Request, upload_session: UploadSession, index: int) -> int:
+    """Stream the request body into chunk ``index`` of the session.
+
+    The chunk is only renamed into place once it has the expected size, so a
+    chunk that is listed as received is always complete. Re-sending a chunk
+    replaces it, unless the session has started completing in the meantime.
+    """
+    if index < 0 or index >= upload_session.chunk_count:
+        raise HTTPException(detail="Chunk index out of range", status_code=400)
+
+    expected = expected_chunk_size(upload_session, index)
+    directory = session_dir(upload_session.id)
+    await aiofiles.os.makedirs(directory, exist_ok=True)
+
+    writer = await StreamingFileWriter(directory, expected, settings.upload_chunk_size).open()
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await writer.write(chunk)
+        if writer.size != expected:
+            raise HTTPException(
+                detail=f"Chunk {index} must be {expected} bytes, got {writer.size}",
+                status_code=400
+            )
+        # A complete request may have started reading the chunks while this body streamed in
+        async with SessionLocal() as db:
+            completing = await db.scalar(
+                select(UploadSession.is_completing).where(UploadSession.id == upload_session.id)
+            )
+        if completing is None:
+            raise HTTPException(detail="Upload session not found", status_code=404)
+        if completing:
+            raise HTTPException(detail="Upload session is being completed", status_code=409)
+        await writer.commit(os.path.join(directory, str(index)))
+    except BaseException:
+        await writer.abort()
+        raise
+    return writer.size
+
+
+async def assemble_chunks(upload_session: UploadSession, db: AsyncSession) -> StoredFile:
+    """Concatenate the session's chunks into the blob store.
+
+    Chunks are copied piece by piece, so memory use does not depend on the
+    size of the upload. The caller commits ``db``.
+    """
+    directory = session_dir(upload_session.id)
+    writer = await StreamingFileWriter(
+        settings.upload_dir, upload_session.total_size, settings.upload_chunk_size
+    ).open()
+    try:
+        for index in range(upload_session.chunk_count):
+            async with aiofiles.open(os.path.join(directory, str(index)), "rb") as f:
+                while chunk := await f.read(settings.upload_chunk_size):
+                    await writer.write(chunk)
+        await writer.close()
+        blob = await acquire_blob(db, writer.sha256, writer.size, writer.temp_path)
+    except BaseException:
+        await writer.abort()
+        raise
+
+    return StoredFile(
+        filename=f"{blob.sha256}{upload_session.file_type}",
+        original_filename=upload_session.original_filename,
+        file_path=blob.file_path,
+        file_size=writer.size,
+        file_type=upload_session.file_type,
+        sha256=blob.sha256
+    )
+
+
+async def discard_session_files(session_id: str) -> None:
+    """Remove every chunk received for a session"""
+    await asyncio.to_thread(shutil.rmtree, session_dir(session_id), True)
+
+
+async def purge_expired_upload_sessions() -> None:
+    """Delete upload sessions, and their chunks, that expired without being finalized.
+
+    The rows go in one statement, so overlapping sweeps cannot conflict over
+    the same session; the chunks of the sessions it deleted follow. Sessions
+    whose chunks are being assembled are left to the complete request.
+    """
+    async with SessionLocal() as db:
+        expired = (await db.scalars(
+            sql_delete(UploadSession)
+            .where(UploadSession.expires_at < datetime.now(UTC), UploadSession.is_completing == False)
+            .returning(UploadSession.id)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+
+    for session_id in expired:
+        await discard_session_files(session_id)
+    if expired:
+        logger.info("Purged %d expired upload sessions", len(expired))
@@ -0,0 +1,118 @@
+import hmac
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+from litestar.stores.base import Store
+from sqlalchemy import delete as sql_delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import SessionLocal
+from app.models import VerificationToken
+from app.stores import stores
+
+VERIFICATION_STORE = "verification-tokens"
+
+
+@dataclass(frozen=True)
+class PendingVerification:
+    token: str
+    expires_at: datetime
+
+    def matches(self, token: str) -> bool:
+        return hmac.compare_digest(self.token.encode(), token.encode())
+
+    @property
+    def expired(self) -> bool:
+        return datetime.now(UTC) > self.expires_at
+
+
+def _expires_at() -> datetime:
+    return datetime.now(UTC) + timedelta(hours=settings.verification_token_expire_hours)
+
+
+class StoreVerificationTokens:
+    """Verification tokens in a shared store, keyed by email.
+
+    With the file store backend every worker on the host sees the same
+    tokens. Entries carry a TTL, so the store's periodic cleanup drops them
+    once they expire.
+    """
+
+    def __init__(self, store: Store):
+        self.store = store
+
+    async def set(self, db: AsyncSession, email: str, token: str) -> None:
+        expires_at = _expires_at()
+        entry = json.dumps({"token": token, "expires_at": expires_at.timestamp()})
+        await self.store.set(
+            email, entry, expires_in=settings.verification_token_expire_hours * 3600
+        )
+
+    async def get(self, db: AsyncSession, email: str) -> Optional[PendingVerification]:
+        data = await self.store.get(email)
+        if data is None:
+            return None
+        entry = json.loads(data)
+        return PendingVerification(entry["token"], datetime.fromtimestamp(entry["expires_at"], UTC))
+
+    async def delete(self, db: AsyncSession, email: str) -> None:
+        await self.store.delete(email)
+
+    async def delete_expired(self) -> None:
+        # Covered by the periodic cleanup of every store
+        pass
+
+
+class DatabaseVerificationTokens:
+    """Verification tokens in the ``verification_tokens`` table, keyed by email.
+
+    Writes join the caller's transaction, so a token is only stored together
+    with the user it belongs to.
+    """
+
+    async def set(self, db: AsyncSession, email: str, token: str) -> None:
+        await db.merge(VerificationToken(email=email, token=token, expires_at=_expires_at()))
+
+    async def get(self, db: AsyncSession, email: str) -> Optional[PendingVerification]:
+        row = (await db.execute(
+            select(VerificationToken.token, VerificationToken.expires_at)
+            .where(VerificationToken.email == email)
+        )).first()
+        if row is None:
+            return None
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:
+            # SQLite hands back naive datetimes
+            expires_at = expires_at.replace(tzinfo=UTC)
+        return PendingVerification(row.token, expires_at)
+
+    async def delete(self, db: AsyncSession, email: str) -> None:
+        await db.execute(
+            sql_delete(VerificationToken)
+            .where(VerificationToken.email == email)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def delete_expired(self) -> None:
+        async with SessionLocal() as db:
+            await db.execute(
+                sql_delete(VerificationToken)
+                .where(VerificationToken.expires_at < datetime.now(UTC))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+
+def _create_verification_tokens():
+    if settings.verification_token_backend == "database":
+        return DatabaseVerificationTokens()
+    return StoreVerificationTokens(stores.get(VERIFICATION_STORE))
+
+
+verification_tokens = _create_verification_tokens()
+
+
+async def delete_expired_verification_tokens() -> None:
+    """Drop verification tokens nobody used before they expired"""
+    await verification_tokens.delete_expired()
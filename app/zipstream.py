@@ -0,0 +1,180 @@
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Tuple
+from app.storage_backends import storage
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_DATA_DESCRIPTOR64 = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_END_OF_CENTRAL_DIR64 = struct.Struct("<IQHHIIQQQQ")
+_END_OF_CENTRAL_DIR64_LOCATOR = struct.Struct("<IIQI")
+
+# CRC-32 follows the data in a descriptor (bit 3), names are UTF-8 (bit 11)
+_FLAGS = 0x0808
+_STORED = 0
+_VERSION = 20
+_VERSION_ZIP64 = 45
+# Made by Unix, so the external attributes carry file permissions
+_MADE_BY_UNIX = 3 << 8
+_FILE_ATTRIBUTES = 0o100644 << 16
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP64_COUNT_LIMIT = 0xFFFF
+
+
+@dataclass
+class ZipEntry:
+    """A stored file to be added to the archive under ``name``"""
+    name: str
+    file_path: str
+    size: int
+    modified: datetime
+    offset: int = 0
+    crc: int = 0
+
+    @property
+    def zip64(self) -> bool:
+        return self.size >= _ZIP64_LIMIT
+
+
+def _dos_datetime(value: datetime) -> Tuple[int, int]:
+    """MS-DOS (time, date) fields; the format can't go before 1980"""
+    if value.year < 1980:
+        return 0, (1 << 5) | 1
+    return (
+        (value.hour << 11) | (value.minute << 5) | (value.second // 2),
+        ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    )
+
+
+def unique_names(names: Iterable[str]) -> List[str]:
+    """Make archive member names flat and distinct: ``a.docx``, ``a (1).docx``, ..."""
+    seen = set()
+    result = []
+    for name in names:
+        name = name.replace("/", "_").replace("\\", "_") or "file"
+        stem, dot, extension = name.rpartition(".")
+        if not dot:
+            stem, extension = name, ""
+        candidate = name
+        counter = 1
+        while candidate in seen:
+            candidate = f"{stem} ({counter}){dot}{extension}"
+            counter += 1
+        seen.add(candidate)
+        result.append(candidate)
+    return result
+
+
+class ZipStream:
+    """ZIP archive of stored files, built while it is being sent.
+
+    Members are stored uncompressed: Office documents are already deflated
+    zips, so compressing them again costs CPU for nothing. Sizes are known
+    up front and the only thing computed on the fly is each member's CRC-32,
+    which goes into a data descriptor after its data. That makes the archive
+    length known before the first byte is produced, and nothing larger than
+    one read chunk is ever held in memory.
+    """
+
+    def __init__(self, entries: List[ZipEntry], chunk_size: int):
+        self.entries = entries
+        self.chunk_size = chunk_size
+
+        offset = 0
+        for entry in entries:
+            entry.offset = offset
+            offset += len(self._local_header(entry)) + entry.size + self._descriptor_size(entry)
+        self.central_dir_offset = offset
+        self.central_dir_size = sum(len(self._central_header(entry)) for entry in entries)
+        self.size = offset + self.central_dir_size + len(self._end_records())
+
+    @staticmethod
+    def _local_header(entry: ZipEntry) -> bytes:
+        name = entry.name.encode("utf-8")
+        dos_time, dos_date = _dos_datetime(entry.modified)
+        if entry.zip64:
+            extra = struct.pack("<HHQQ", 0x0001, 16, entry.size, entry.size)
+            size = _ZIP64_LIMIT
+        else:
+            extra = b""
+            size = entry.size
+        # The CRC isn't known yet; readers take it from the descriptor. Sizes
+        # are filled in so streaming readers can find the end of stored data.
+        return _LOCAL_HEADER.pack(
+            0x04034b50, _VERSION_ZIP64 if entry.zip64 else _VERSION, _FLAGS, _STORED,
+            dos_time, dos_date, 0, size, size, len(name), len(extra)
+        ) + name + extra
+
+    @staticmethod
+    def _descriptor_size(entry: ZipEntry) -> int:
+        return _DATA_DESCRIPTOR64.size if entry.zip64 else _DATA_DESCRIPTOR.size
+
+    @staticmethod
+    def _descriptor(entry: ZipEntry) -> bytes:
+        if entry.zip64:
+            return _DATA_DESCRIPTOR64.pack(0x08074b50, entry.crc, entry.size, entry.size)
+        return _DATA_DESCRIPTOR.pack(0x08074b50, entry.crc, entry.size, entry.size)
+
+    @staticmethod
+    def _central_header(entry: ZipEntry) -> bytes:
+        name = entry.name.encode("utf-8")
+        dos_time, dos_date = _dos_datetime(entry.modified)
+        size, offset = entry.size, entry.offset
+        zip64_fields = []
+        if size >= _ZIP64_LIMIT:
+            zip64_fields += [size, size]
+            size = _ZIP64_LIMIT
+        if offset >= _ZIP64_LIMIT:
+            zip64_fields.append(offset)
+            offset = _ZIP64_LIMIT
+        extra = b""
+        if zip64_fields:
+            extra = struct.pack(f"<HH{len(zip64_fields)}Q", 0x0001, 8 * len(zip64_fields), *zip64_fields)
+        version = _VERSION_ZIP64 if zip64_fields else _VERSION
+        return _CENTRAL_HEADER.pack(
+            0x02014b50, _MADE_BY_UNIX | version, version, _FLAGS, _STORED,
+            dos_time, dos_date, entry.crc, size, size, len(name), len(extra), 0,
+            0, 0, _FILE_ATTRIBUTES, offset
+        ) + name + extra
+
+    def _end_records(self) -> bytes:
+        count = len(self.entries)
+        records = b""
+        if (
+            count >= _ZIP64_COUNT_LIMIT
+            or self.central_dir_offset >= _ZIP64_LIMIT
+            or self.central_dir_size >= _ZIP64_LIMIT
+        ):
+            end64_offset = self.central_dir_offset + self.central_dir_size
+            records = _END_OF_CENTRAL_DIR64.pack(
+                0x06064b50, _END_OF_CENTRAL_DIR64.size - 12, _MADE_BY_UNIX | _VERSION_ZIP64,
+                _VERSION_ZIP64, 0, 0, count, count, self.central_dir_size, self.central_dir_offset
+            ) + _END_OF_CENTRAL_DIR64_LOCATOR.pack(0x07064b50, 0, end64_offset, 1)
+        return records + _END_OF_CENTRAL_DIR.pack(
+            0x06054b50, 0, 0,
+            min(count, _ZIP64_COUNT_LIMIT), min(count, _ZIP64_COUNT_LIMIT),
+            min(self.central_dir_size, _ZIP64_LIMIT), min(self.central_dir_offset, _ZIP64_LIMIT), 0
+        )
+
+    async def iterate(self) -> AsyncIterator[bytes]:
+        """Produce the archive, starting with the first member's header right away"""
+        for entry in self.entries:
+            yield self._local_header(entry)
+            crc = 0
+            remaining = entry.size
+            async for chunk in storage.read(entry.file_path, 0, entry.size, self.chunk_size):
+                crc = zlib.crc32(chunk, crc)
+                remaining -= len(chunk)
+                yield chunk
+            if remaining:
+                # The announced sizes are already on the wire; all we can do
+                # is abort so the client sees a truncated transfer
+                raise OSError(f"{entry.file_path} shrank while being archived")
+            entry.crc = crc
+            yield self._descriptor(entry)
+
+        yield b"".join(self._central_header(entry) for entry in self.entries) + self._end_records()
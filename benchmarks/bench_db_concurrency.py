@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Database concurrency load test: throughput as concurrent clients increase
+
+Starts the app under uvicorn (one worker) and hammers a database-bound
+endpoint, GET /files/download/{id}, which authenticates the client, looks
+the file up and inserts a download token. With a blocking driver the worker
+serializes requests behind each query, so throughput stays flat as
+concurrency grows; with the async driver it keeps scaling until the
+database saturates.
+
+Pass --app-dir more than once to compare trees side by side, e.g. the
+commit before the async database layer:
+
+    git worktree add /tmp/before <commit>
+    python -m benchmarks.bench_db_concurrency --app-dir /tmp/before --app-dir .
+
+SQLite serializes writes and answers in microseconds, so point
+--database-url at PostgreSQL for numbers that reflect real round trips.
+
+Usage:
+    python -m benchmarks.bench_db_concurrency --concurrency 1,8,32,64 --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database import async_database_url
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(app_dir: str, work_dir: str, port: int, database_url: str, workers: int = 0):
+    """Run the app from ``app_dir`` with its runtime files kept in ``work_dir``.
+
+    With ``workers``, runs the production launcher (app.server) with that
+    many worker processes instead of a single uvicorn process.
+    """
+    env = dict(os.environ, DRAIN_DELAY="0")
+    if database_url:
+        env.pop("TESTING", None)
+        env["DATABASE_URL"] = database_url
+    else:
+        env["TESTING"] = "1"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath(app_dir), env.get("PYTHONPATH")]))
+    if workers:
+        env.update(WORKERS=str(workers), HOST="127.0.0.1", PORT=str(port), WORKER_MAX_REQUESTS="0")
+        command = [sys.executable, "-m", "app.server"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(
+        command,
+        cwd=work_dir,
+        env=env,
+        stdout=subprocess.DEVNULL
+    )
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await client.get("/")
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def prepare(client: httpx.AsyncClient, database_url: str) -> tuple:
+    """Create an Ops user with one file and a verified client; returns (client headers, file id)"""
+    suffix = str(time.time_ns())
+    password = "benchmark-password"
+    ops = {"email": f"ops{suffix}@example.com", "username": f"ops{suffix}", "password": password, "user_type": "ops"}
+    user = {"email": f"client{suffix}@example.com", "username": f"client{suffix}", "password": password, "user_type": "client"}
+
+    await client.post("/auth/create-ops-user", json=ops)
+    ops_token = (await client.post("/auth/login", json={"email": ops["email"], "password": password})).json()["access_token"]
+    upload = await client.post(
+        "/files/upload",
+        files={"file": ("bench.docx", b"benchmark", "application/octet-stream")},
+        headers={"Authorization": f"Bearer {ops_token}"}
+    )
+    file_id = int(upload.json()["message"].rsplit(" ", 1)[1])
+
+    # The verification token only goes out by email, so verify the client directly
+    await client.post("/auth/signup", json=user)
+    engine = create_async_engine(async_database_url(database_url))
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE users SET is_verified = true WHERE email = :email"), {"email": user["email"]})
+    await engine.dispose()
+    client_token = (await client.post("/auth/login", json={"email": user["email"], "password": password})).json()["access_token"]
+
+    return {"Authorization": f"Bearer {client_token}"}, file_id
+
+
+async def run_level(
+    client: httpx.AsyncClient, path: str, headers: dict, concurrency: int, total: int, time_limit: float
+) -> dict:
+    """Issue ``total`` requests from ``concurrency`` clients, giving up after ``time_limit`` seconds"""
+    latencies = []
+    errors = 0
+    remaining = total
+    start = time.perf_counter()
+    deadline = start + time_limit
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0 and time.perf_counter() < deadline:
+            remaining -= 1
+            sent = time.perf_counter()
+            try:
+                response = await client.get(path, headers=headers)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - sent)
+            errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": (len(latencies) - errors) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+        "errors": errors,
+    }
+
+
+async def bench_tree(app_dir: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as work_dir:
+        port = free_port()
+        database_url = args.database_url or f"sqlite:///{work_dir}/test.db"
+        server = start_server(app_dir, work_dir, port, args.database_url)
+        try:
+            limits = httpx.Limits(max_connections=max(args.concurrency))
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=args.request_timeout
+            ) as client:
+                await wait_until_ready(client)
+                headers, file_id = await prepare(client, database_url)
+                path = f"/files/download/{file_id}"
+                await run_level(client, path, headers, 4, 50, args.time_limit)  # warm up
+                return {
+                    c: await run_level(client, path, headers, c, args.requests, args.time_limit)
+                    for c in args.concurrency
+                }
+        finally:
+            server.terminate()
+            server.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", action="append", help="tree to run the app from (repeatable, default: this one)")
+    parser.add_argument("--database-url", default="", help="database to run against (default: a fresh SQLite file)")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+    parser.add_argument("--request-timeout", type=float, default=10.0, help="seconds before a request counts as failed")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="seconds before a level stops early")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    app_dirs = args.app_dir or [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+
+    print(f"GET /files/download/{{id}}, {args.requests} requests per level, database: {args.database_url or 'sqlite'}\n")
+    print(f"{'tree':<24}{'clients':>8}{'req/s':>10}{'scaling':>9}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for app_dir in app_dirs:
+        results = await bench_tree(app_dir, args)
+        baseline = results[args.concurrency[0]]["rps"] or 1
+        for concurrency, r in results.items():
+            print(
+                f"{os.path.basename(os.path.abspath(app_dir)):<24}{concurrency:>8}{r['rps']:>10.0f}"
+                f"{r['rps'] / baseline:>8.1f}x{r['p50']:>9.1f}{r['p99']:>9.1f}{r['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
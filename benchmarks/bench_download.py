@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Download benchmark: in-memory bodies vs streamed file responses
+
+Drives the ASGI response objects directly (no network, no database) so the
+numbers isolate the cost of producing the response body.
+
+Usage:
+    python -m benchmarks.bench_download --size-mb 10 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from litestar.response.base import ASGIResponse
+from app.responses import ASGIFileStreamResponse, ZERO_COPY_SEND_EXTENSION
+
+
+# Per-client link speed in bytes per second; set from --link-mb-s
+LINK_SPEED = 0
+
+
+def make_channel(counter: list):
+    """Build an ASGI receive/send pair that reports a disconnect once the body is done.
+
+    ``send`` sleeps as if the bytes went out over a link of ``LINK_SPEED``, so
+    responses stay in flight concurrently like they would behind real clients.
+    """
+    done = asyncio.Event()
+
+    async def receive():
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent = 0
+        if message["type"] == "http.response.body":
+            sent = len(message["body"])
+        elif message["type"] == ZERO_COPY_SEND_EXTENSION:
+            sent = message["count"]
+        counter[0] += sent
+        if LINK_SPEED:
+            await asyncio.sleep(sent / LINK_SPEED)
+        if message["type"] != "http.response.start" and not message.get("more_body", False):
+            done.set()
+
+    return receive, send
+
+
+async def legacy_download(path: str, counter: list, scope: dict):
+    """Previous behaviour: read the whole file and send it as one body"""
+    with open(path, "rb") as f:
+        content = f.read()
+    response = ASGIResponse(body=content, media_type="application/octet-stream")
+    await response(scope, *make_channel(counter))
+
+
+async def streamed_download(path: str, counter: list, scope: dict, chunk_size: int):
+    response = ASGIFileStreamResponse(
+        file_path=path,
+        file_size=os.path.getsize(path),
+        chunk_size=chunk_size,
+        media_type="application/octet-stream",
+    )
+    await response(scope, *make_channel(counter))
+
+
+async def run(name: str, factory, concurrency: int, requests: int, heartbeat: bool) -> dict:
+    """Run ``requests`` downloads with at most ``concurrency`` in flight"""
+    counter = [0]
+    lags = []
+    stop = asyncio.Event()
+
+    async def measure_loop_lag():
+        # How late a 10ms timer fires is a proxy for event-loop starvation
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await factory(counter)
+
+    tracemalloc.start()
+    lag_task = asyncio.create_task(measure_loop_lag()) if heartbeat else None
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stop.set()
+    if lag_task:
+        await lag_task
+
+    return {
+        "name": name,
+        "seconds": elapsed,
+        "throughput_mb_s": counter[0] / elapsed / 1024 / 1024,
+        "peak_mb": peak / 1024 / 1024,
+        "max_loop_lag_ms": max(lags) * 1000 if lags else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--chunk-size", type=int, default=262144)
+    parser.add_argument("--link-mb-s", type=float, default=100.0, help="simulated per-client bandwidth, 0 to disable")
+    args = parser.parse_args()
+
+    global LINK_SPEED
+    LINK_SPEED = args.link_mb_s * 1024 * 1024
+
+    http_scope = {"type": "http", "extensions": {}}
+    zero_copy_scope = {"type": "http", "extensions": {ZERO_COPY_SEND_EXTENSION: {}}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "payload.pptx")
+        with open(path, "wb") as f:
+            f.write(os.urandom(args.size_mb * 1024 * 1024))
+
+        results = [
+            await run(
+                "legacy (read whole file)",
+                lambda c: legacy_download(path, c, http_scope),
+                args.concurrency, args.requests, heartbeat=True,
+            ),
+            await run(
+                "streamed (chunked reader)",
+                lambda c: streamed_download(path, c, http_scope, args.chunk_size),
+                args.concurrency, args.requests, heartbeat=True,
+            ),
+            await run(
+                "streamed (zero-copy send)",
+                lambda c: streamed_download(path, c, zero_copy_scope, args.chunk_size),
+                args.concurrency, args.requests, heartbeat=True,
+            ),
+        ]
+
+    print(
+        f"{args.requests} downloads of {args.size_mb}MB, concurrency {args.concurrency}, "
+        f"{args.link_mb_s:g}MB/s per client"
+    )
+    print(f"{'mode':<28}{'seconds':>10}{'MB/s':>10}{'peak MB':>10}{'max lag ms':>12}")
+    for r in results:
+        print(
+            f"{r['name']:<28}{r['seconds']:>10.2f}{r['throughput_mb_s']:>10.1f}"
+            f"{r['peak_mb']:>10.1f}{r['max_loop_lag_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
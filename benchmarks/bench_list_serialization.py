@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+/files/list serialization benchmark: Pydantic models vs msgspec Structs
+
+Times what /files/list does with a page of rows once the query has
+returned: build a FileResponse per row, wrap them in a FileListResponse and
+encode it to JSON. Runs for each SCHEMA_BACKEND, so no database or server
+is involved and the numbers isolate serialization cost.
+
+Usage:
+    python -m benchmarks.bench_list_serialization --page-sizes 50,500 --seconds 2
+"""
+
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+
+# app.schemas exports the Pydantic models under this setting; app.structs
+# always holds the msgspec ones
+os.environ["SCHEMA_BACKEND"] = "pydantic"
+
+from app import schemas, structs  # noqa: E402
+
+
+@dataclass(slots=True)
+class Row:
+    """Stand-in for a SQLAlchemy result row: read through attributes"""
+    id: int
+    filename: str
+    original_filename: str
+    file_size: int
+    file_type: str
+    sha256: Optional[str]
+    uploader_id: int
+    created_at: datetime
+
+
+def make_rows(count: int) -> list:
+    """Rows shaped like the /files/list query results"""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return [
+        Row(
+            id=i,
+            filename=f"{i:064x}.docx",
+            original_filename=f"Quarterly report {i}.docx",
+            file_size=100_000 + i,
+            file_type=".docx",
+            sha256=f"{i:064x}",
+            uploader_id=1 + i % 7,
+            created_at=now - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def serialize_page(module, rows: list) -> bytes:
+    """The tail of /files/list: rows to response objects to JSON"""
+    file_list = module.FileListResponse(
+        files=[module.from_row(module.FileResponse, row) for row in rows],
+        total=len(rows) * 10,
+        next_cursor="MjAyNC0wMS0xNVQxMDozMDowMHw0Mg",
+    )
+    return module.to_json(file_list)
+
+
+def bench(module, rows: list, seconds: float) -> dict:
+    serialize_page(module, rows)  # warm up
+    pages = 0
+    body = b""
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        body = serialize_page(module, rows)
+        pages += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "pages_per_s": pages / elapsed,
+        "rows_per_s": pages * len(rows) / elapsed,
+        "us_per_page": elapsed / pages * 1e6,
+        "body_bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", default="50,500", help="comma-separated rows per page")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each measurement")
+    args = parser.parse_args()
+    backends = {"pydantic": schemas, "msgspec": structs}
+
+    print(f"{'rows':>6}{'backend':>10}{'pages/s':>11}{'rows/s':>12}{'us/page':>10}{'speedup':>9}")
+    for page_size in (int(size) for size in args.page_sizes.split(",")):
+        rows = make_rows(page_size)
+        # Both backends must produce the same document
+        assert json.loads(serialize_page(schemas, rows)) == json.loads(serialize_page(structs, rows))
+        baseline = None
+        for name, module in backends.items():
+            r = bench(module, rows, args.seconds)
+            baseline = baseline or r["pages_per_s"]
+            print(
+                f"{page_size:>6}{name:>10}{r['pages_per_s']:>11.0f}{r['rows_per_s']:>12.0f}"
+                f"{r['us_per_page']:>10.1f}{r['pages_per_s'] / baseline:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
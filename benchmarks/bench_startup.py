@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark: how long a fresh worker takes to serve traffic
+
+Each run starts a new interpreter and records:
+
+    import      seconds to ``import app.main`` (which builds the app)
+    live        seconds from spawning uvicorn to the first 200 from /healthz
+    ready       seconds from spawning uvicorn to the first 200 from /readyz,
+                i.e. pool and auth backends warmed and the database answering
+    first       milliseconds for the first GET /files/list once ready
+    second      milliseconds for the one after it
+
+Pass --app-dir more than once to compare trees, e.g. a checkout of an
+earlier commit. Trees without /healthz fall back to GET / for "live" and
+report no "ready".
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.bench_db_concurrency import free_port, start_server
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+
+
+def measure_import(app_dir: str, work_dir: str) -> float:
+    env = dict(os.environ, TESTING="1")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.abspath(app_dir), env.get("PYTHONPATH")]))
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=work_dir, env=env, capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+async def poll(client: httpx.AsyncClient, paths: list, started: float, timeout: float):
+    """Seconds since ``started`` until one of ``paths`` answers 200, or None if none of them exist"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            for path in paths:
+                status = (await client.get(path)).status_code
+                if status == 200:
+                    return time.perf_counter() - started
+                if status != 404:
+                    break
+            else:
+                return None
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{paths[0]} did not answer within {timeout}s")
+        await asyncio.sleep(0.01)
+
+
+async def timed_get(client: httpx.AsyncClient, path: str) -> float:
+    start = time.perf_counter()
+    await client.get(path)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_once(app_dir: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = {"import": measure_import(app_dir, work_dir)}
+        port = free_port()
+        started = time.perf_counter()
+        server = start_server(app_dir, work_dir, port, args.database_url)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=args.timeout) as client:
+                result["live"] = await poll(client, ["/healthz", "/"], started, args.timeout)
+                result["ready"] = await poll(client, ["/readyz"], started, args.timeout)
+                result["first"] = await timed_get(client, "/files/list")
+                result["second"] = await timed_get(client, "/files/list")
+        finally:
+            server.terminate()
+            server.wait()
+    return result
+
+
+def summarize(values: list) -> str:
+    values = [v for v in values if v is not None]
+    if not values:
+        return f"{'-':>18}"
+    return f"{statistics.median(values):.3f} ({max(values):.3f})".rjust(18)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", action="append", help="tree to run the app from (repeatable, default: this one)")
+    parser.add_argument("--database-url", default="", help="database to run against (default: a fresh SQLite file)")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per tree")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the server")
+    args = parser.parse_args()
+    app_dirs = args.app_dir or [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+    columns = ("import", "live", "ready", "first", "second")
+
+    print(f"{args.runs} cold starts per tree, median (max); import/live/ready in s, requests in ms\n")
+    print(f"{'tree':<24}" + "".join(f"{c:>18}" for c in columns))
+    for app_dir in app_dirs:
+        runs = [await run_once(app_dir, args) for _ in range(args.runs)]
+        print(
+            f"{os.path.basename(os.path.abspath(app_dir)):<24}"
+            + "".join(summarize([r[c] for r in runs]) for c in columns)
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
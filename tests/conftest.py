@@ -0,0 +1,4 @@
+import os
+
+# Selects the SQLite test database before anything imports app.database
+os.environ.setdefault("TESTING", "1")
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import app.blobstore as blobstore
+from app.database import Base
+from app.models import Blob
+from app.storage_backends import LocalStorage
+
+SHA256 = "cd" * 32
+CONTENT = b"shared content"
+
+
+class PausingStorage(LocalStorage):
+    """Local storage whose deletes wait until ``resume`` is set"""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.deleting = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def delete(self, location: str) -> None:
+        self.deleting.set()
+        await self.resume.wait()
+        await super().delete(location)
+
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'blobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    backend = PausingStorage(str(tmp_path / "store"))
+    monkeypatch.setattr(blobstore, "storage", backend)
+    return backend
+
+
+@pytest.fixture
+def upload(tmp_path):
+    def write() -> str:
+        path = tmp_path / f"upload-{os.urandom(4).hex()}.part"
+        path.write_bytes(CONTENT)
+        return str(path)
+
+    return write
+
+
+async def stored(sessions, storage) -> tuple:
+    async with sessions() as db:
+        blob = await db.get(Blob, SHA256)
+    size = await storage.size(blobstore.blob_path(SHA256))
+    return (blob.ref_count if blob else None), size
+
+
+async def released(sessions, upload) -> str:
+    """Store the content once and drop the reference again, returning its path"""
+    await acquire(sessions, upload())
+    async with sessions() as db:
+        path = await blobstore.release_blob(db, SHA256)
+        await db.commit()
+    assert path is not None
+    return path
+
+
+async def acquire(sessions, source_path: str) -> None:
+    async with sessions() as db:
+        await blobstore.acquire_blob(db, SHA256, len(CONTENT), source_path)
+        await db.commit()
+
+
+async def discard(sessions, path: str) -> None:
+    async with sessions() as db:
+        await blobstore.discard_blob(db, SHA256, path)
+
+
+@pytest.mark.asyncio
+async def test_last_release_discards_row_and_content(sessions, storage, upload):
+    path = await released(sessions, upload)
+    assert await stored(sessions, storage) == (0, len(CONTENT))
+
+    storage.resume.set()
+    await discard(sessions, path)
+
+    assert await stored(sessions, storage) == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_upload_during_discard_stores_the_content_again(sessions, storage, upload):
+    path = await released(sessions, upload)
+
+    discarding = asyncio.create_task(discard(sessions, path))
+    await storage.deleting.wait()
+    # The row is deleted but not yet committed; the upload has to wait for it
+    acquiring = asyncio.create_task(acquire(sessions, upload()))
+    await asyncio.sleep(0.2)
+    assert not acquiring.done()
+
+    storage.resume.set()
+    await discarding
+    await acquiring
+
+    assert await stored(sessions, storage) == (1, len(CONTENT))
+
+
+@pytest.mark.asyncio
+async def test_upload_before_discard_keeps_the_content(sessions, storage, upload):
+    path = await released(sessions, upload)
+    storage.resume.set()
+
+    async with sessions() as db:
+        await blobstore.acquire_blob(db, SHA256, len(CONTENT), upload())
+        # The revived row is still uncommitted when the discard starts
+        discarding = asyncio.create_task(discard(sessions, path))
+        await asyncio.sleep(0.2)
+        assert not discarding.done()
+        await db.commit()
+    await discarding
+
+    assert not storage.deleting.is_set()
+    assert await stored(sessions, storage) == (1, len(CONTENT))
@@ -0,0 +1,54 @@
+import os
+import pytest
+from litestar.testing import TestClient
+from app.auth import create_access_token
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models import User
+
+CONTENT = os.urandom(10_000)
+
+
+async def add_user(email: str, user_type: str) -> None:
+    async with SessionLocal() as db:
+        db.add(User(
+            email=email, username=email, hashed_password="-", user_type=user_type, is_verified=True
+        ))
+        await db.commit()
+
+
+def bearer(email: str, user_type: str) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': email, 'user_type': user_type})}"}
+
+
+@pytest.fixture
+def client():
+    with TestClient(app=app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("link_mode", ["token", "signed"])
+def test_redeemed_link_only_resumes(client, monkeypatch, link_mode):
+    monkeypatch.setattr(settings, "download_link_mode", link_mode)
+    suffix = os.urandom(4).hex()
+    ops, user = f"ops-{suffix}@example.com", f"client-{suffix}@example.com"
+    with client.portal() as portal:
+        portal.call(add_user, ops, "ops")
+        portal.call(add_user, user, "client")
+
+    response = client.post("/files/upload", files={"file": ("report.docx", CONTENT)}, headers=bearer(ops, "ops"))
+    file_id = int(response.json()["message"].split()[-1])
+    link = client.get(f"/files/download/{file_id}", headers=bearer(user, "client")).json()["download_link"]
+    path = "/files/" + link.split("/files/", 1)[1]
+
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.content == CONTENT
+
+    assert client.get(path).status_code == 400
+    assert client.get(path, headers={"Range": "bytes=0-"}).status_code == 400
+
+    resumed = client.get(path, headers={"Range": "bytes=100-", "If-Range": first.headers["etag"]})
+    assert resumed.status_code == 206
+    assert resumed.content == CONTENT[100:]
@@ -0,0 +1,185 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+import pytest
+from aiosmtpd.controller import Controller
+from app.config import settings
+from app.mail_queue import MailQueue
+
+
+class Sink:
+    """aiosmtpd handler recording delivered mail; replies queued in ``data_replies`` are used first"""
+
+    def __init__(self):
+        self.delivered = []
+        self.sessions = 0
+        self.data_replies = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.data_replies:
+            return self.data_replies.pop(0)
+        self.delivered.append((envelope.rcpt_tos, envelope.content.decode()))
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    handler = Sink()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_server", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", controller.port)
+    monkeypatch.setattr(settings, "smtp_use_tls", False)
+    monkeypatch.setattr(settings, "smtp_username", None)
+    monkeypatch.setattr(settings, "smtp_password", None)
+    monkeypatch.setattr(settings, "smtp_timeout", 5)
+    monkeypatch.setattr(settings, "mail_retry_backoff", 0.05)
+    yield handler
+    controller.stop()
+
+
+def message(index: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@example.com"
+    msg["To"] = f"user{index}@example.com"
+    msg["Subject"] = f"Message {index}"
+    msg.set_content(f"Body {index}")
+    return msg
+
+
+def enqueue(queue: MailQueue, indexes) -> None:
+    for index in indexes:
+        assert queue.enqueue(message(index), f"user{index}@example.com")
+
+
+async def wait_for(condition, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_batches_share_one_connection(sink):
+    queue = MailQueue(workers=1, batch_size=10, max_size=100)
+    enqueue(queue, range(25))
+    await queue.start()
+    await queue.stop()
+
+    assert sorted(rcpt for rcpt, _ in sink.delivered) == sorted([f"user{i}@example.com"] for i in range(25))
+    assert queue.stats.sent == 25
+    assert queue.stats.batches == 3
+    assert queue.stats.connections == 1
+    assert sink.sessions == 1
+
+
+@pytest.mark.asyncio
+async def test_connection_is_reused_across_batches(sink):
+    queue = MailQueue(workers=1, batch_size=5, max_size=100)
+    await queue.start()
+    enqueue(queue, range(5))
+    await wait_for(lambda: len(sink.delivered) == 5)
+    enqueue(queue, range(5, 10))
+    await queue.stop()
+
+    assert len(sink.delivered) == 10
+    assert queue.stats.batches == 2
+    assert sink.sessions == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_connection_is_closed_and_reopened(sink, monkeypatch):
+    monkeypatch.setattr(settings, "mail_connection_idle_timeout", 0.1)
+    queue = MailQueue(workers=1, batch_size=5, max_size=100)
+    await queue.start()
+    enqueue(queue, [0])
+    await wait_for(lambda: len(sink.delivered) == 1)
+    await asyncio.sleep(0.3)
+    enqueue(queue, [1])
+    await queue.stop()
+
+    assert len(sink.delivered) == 2
+    assert queue.stats.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried_with_backoff(sink, monkeypatch):
+    monkeypatch.setattr(settings, "mail_max_attempts", 5)
+    sink.data_replies = ["451 Try again later", "451 Try again later"]
+    queue = MailQueue(workers=1, batch_size=5, max_size=100)
+    await queue.start()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    enqueue(queue, [0])
+    await wait_for(lambda: len(sink.delivered) == 1)
+    elapsed = loop.time() - started
+    await queue.stop()
+
+    assert queue.stats.retried == 2
+    assert queue.stats.sent == 1
+    assert queue.stats.failed == 0
+    # Backoff of 0.05s, then 0.1s
+    assert elapsed >= 0.15
+    # The session survives 4xx replies
+    assert queue.stats.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(sink, monkeypatch):
+    monkeypatch.setattr(settings, "mail_max_attempts", 2)
+    sink.data_replies = ["451 Try again later"] * 2
+    queue = MailQueue(workers=1, batch_size=5, max_size=100)
+    await queue.start()
+    enqueue(queue, [0])
+    await wait_for(lambda: queue.stats.failed == 1)
+    await queue.stop()
+
+    assert queue.stats.retried == 1
+    assert sink.delivered == []
+
+
+@pytest.mark.asyncio
+async def test_permanent_failure_is_not_retried(sink):
+    sink.data_replies = ["550 No such user"]
+    queue = MailQueue(workers=1, batch_size=5, max_size=100)
+    enqueue(queue, [0, 1])
+    await queue.start()
+    await queue.stop()
+
+    assert queue.stats.failed == 1
+    assert queue.stats.retried == 0
+    assert [rcpt for rcpt, _ in sink.delivered] == [["user1@example.com"]]
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_the_queue(sink):
+    queue = MailQueue(workers=2, batch_size=20, max_size=500)
+    await queue.start()
+    enqueue(queue, range(200))
+    await queue.stop()
+
+    assert len(sink.delivered) == 200
+    assert queue.snapshot()["queued"] == 0
+    assert sink.sessions == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_messages(sink):
+    queue = MailQueue(workers=1, batch_size=5, max_size=3)
+    enqueue(queue, range(3))
+    assert not queue.enqueue(message(3), "user3@example.com")
+    await queue.start()
+    await queue.stop()
+
+    assert queue.stats.rejected == 1
+    assert len(sink.delivered) == 3
@@ -0,0 +1,213 @@
+import asyncio
+import os
+import pytest
+from litestar import Request
+from litestar.exceptions import HTTPException
+from app.responses import (
+    MAX_RANGES,
+    ZERO_COPY_SEND_EXTENSION,
+    ASGIFileStreamResponse,
+    is_not_modified,
+    may_reuse_download,
+    parse_range_header,
+    reuses_download,
+)
+
+CONTENT = bytes(range(256)) * 40
+ETAG = '"abc123"'
+SIZE = 1000
+
+
+@pytest.fixture
+def stored_file(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+async def run(response: ASGIFileStreamResponse, extensions: dict) -> list:
+    """Call the response as an ASGI app and return the messages it sent"""
+    messages = []
+    finished = asyncio.Event()
+
+    async def receive():
+        # Like a server, report the client as gone once the response is complete
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == ZERO_COPY_SEND_EXTENSION:
+            # What the server would do with the descriptor: os.sendfile from it
+            message = {**message, "data": os.pread(message["file"].fileno(), message["count"], message["offset"])}
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message["more_body"]:
+            finished.set()
+
+    await response({"type": "http", "extensions": extensions}, receive, send)
+    return messages
+
+
+def body(messages: list) -> bytes:
+    return b"".join(m.get("body", b"") or m.get("data", b"") for m in messages[1:])
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_send_hands_over_the_file(stored_file):
+    response = ASGIFileStreamResponse(file_path=stored_file, file_size=len(CONTENT), chunk_size=1024)
+    messages = await run(response, {ZERO_COPY_SEND_EXTENSION: {}})
+
+    zero_copy = [m for m in messages if m["type"] == ZERO_COPY_SEND_EXTENSION]
+    assert [(m["offset"], m["count"]) for m in zero_copy] == [(0, len(CONTENT))]
+    assert zero_copy[0]["file"].closed
+    assert messages[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+    assert body(messages) == CONTENT
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_send_of_several_ranges(stored_file):
+    ranges = [(0, 9), (100, 199)]
+    response = ASGIFileStreamResponse(
+        file_path=stored_file, file_size=len(CONTENT), chunk_size=1024, ranges=ranges
+    )
+    messages = await run(response, {ZERO_COPY_SEND_EXTENSION: {}})
+
+    zero_copy = [m for m in messages if m["type"] == ZERO_COPY_SEND_EXTENSION]
+    assert [(m["offset"], m["count"]) for m in zero_copy] == [(0, 10), (100, 100)]
+    boundary = response.headers["content-type"].split("boundary=")[1].encode()
+    assert len(body(messages)) == int(response.headers["content-length"])
+    assert body(messages).count(boundary) == 3
+    assert CONTENT[100:200] in body(messages)
+
+
+@pytest.mark.asyncio
+async def test_head_response_sends_no_body(stored_file):
+    response = ASGIFileStreamResponse(
+        file_path=stored_file, file_size=len(CONTENT), chunk_size=1024, is_head_response=True
+    )
+    messages = await run(response, {ZERO_COPY_SEND_EXTENSION: {}})
+
+    assert not response.zero_copy
+    assert [m["type"] for m in messages] == ["http.response.start", "http.response.body"]
+    assert messages[1]["body"] == b""
+
+
+@pytest.mark.asyncio
+async def test_without_the_extension_the_file_is_streamed(stored_file):
+    response = ASGIFileStreamResponse(file_path=stored_file, file_size=len(CONTENT), chunk_size=1024)
+    messages = await run(response, {})
+
+    assert not response.zero_copy
+    assert {m["type"] for m in messages} == {"http.response.start", "http.response.body"}
+    assert body(messages) == CONTENT
+
+
+def request(**headers: str) -> Request:
+    """A GET request carrying the given headers, e.g. ``If_Range='"abc"'``"""
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": raw})
+
+
+@pytest.mark.parametrize("header", ["bytes=abc", "bytes=5", "bytes=10-5", "bytes=", "items=0-9", "bytes=1-2-3"])
+def test_malformed_range_is_ignored(header):
+    assert parse_range_header(header, SIZE) is None
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=-100", [(900, 999)]),
+        ("bytes=-5000", [(0, 999)]),
+        ("bytes=900-5000", [(900, 999)]),
+        ("bytes=0-99,50-149,150-199", [(0, 199)]),
+        ("bytes=500-599,0-9", [(0, 9), (500, 599)]),
+        ("bytes=0-9,2000-", [(0, 9)]),
+    ],
+)
+def test_ranges_are_clamped_sorted_and_merged(header, expected):
+    assert parse_range_header(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0", "bytes=5000-6000,2000-"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range_header(header, SIZE)
+
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers["Content-Range"] == f"bytes */{SIZE}"
+
+
+def test_too_many_ranges_are_ignored():
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+
+    assert parse_range_header(header, SIZE) is None
+
+
+@pytest.mark.parametrize(
+    "range_header",
+    ["bytes=100-", "bytes=-10", "bytes=0-9,20-29", "bytes=0-998"],
+)
+def test_partial_range_with_matching_if_range_reuses(range_header):
+    assert reuses_download(request(Range=range_header, If_Range=ETAG), ETAG, SIZE)
+
+
+@pytest.mark.parametrize(
+    "range_header",
+    ["bytes=0-", "bytes=0-10,11-", "bytes=-1000", "bytes=0-499,400-999", "bytes=0-5000"],
+)
+def test_range_covering_the_whole_file_is_not_reuse(range_header):
+    assert not reuses_download(request(Range=range_header, If_Range=ETAG), ETAG, SIZE)
+
+
+@pytest.mark.parametrize(
+    "if_range",
+    ["W/" + ETAG, '"other"', "*", "Wed, 21 Oct 2015 07:28:00 GMT", ""],
+)
+def test_if_range_must_strongly_match(if_range):
+    assert not reuses_download(request(Range="bytes=100-", If_Range=if_range), ETAG, SIZE)
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {},
+        {"Range": "bytes=100-"},
+        {"Range": "bytes=5000-", "If_Range": ETAG},
+        {"Range": "bytes=abc", "If_Range": ETAG},
+        {"If_None_Match": '"other"'},
+    ],
+)
+def test_full_downloads_are_not_reuse(headers):
+    assert not reuses_download(request(**headers), ETAG, SIZE)
+
+
+@pytest.mark.parametrize("if_none_match", [ETAG, "W/" + ETAG, f'"other", {ETAG}', "*"])
+def test_not_modified_revalidation_is_reuse(if_none_match):
+    req = request(If_None_Match=if_none_match)
+
+    assert is_not_modified(req, ETAG, None)
+    assert reuses_download(req, ETAG, SIZE)
+
+
+def test_if_none_match_star_needs_an_etag():
+    assert not is_not_modified(request(If_None_Match="*"), None, None)
+    assert not reuses_download(request(If_None_Match="*"), None, SIZE)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    req = request(If_None_Match='"other"', If_Modified_Since="Wed, 21 Oct 2099 07:28:00 GMT")
+
+    assert not is_not_modified(req, ETAG, 0)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, False),
+        ({"Range": "bytes=100-"}, False),
+        ({"If_Range": ETAG}, False),
+        ({"Range": "bytes=100-", "If_Range": ETAG}, True),
+        ({"If_None_Match": ETAG}, True),
+    ],
+)
+def test_may_reuse_download(headers, expected):
+    assert may_reuse_download(request(**headers)) is expected
@@ -0,0 +1,120 @@
+import os
+import pytest
+from app.config import settings
+from app.storage_backends import LocalStorage, S3Storage
+
+# The same cases run against both backends; S3 is served by moto
+BUCKET = "test-blobs"
+SHA256 = "ab" * 32
+PART_SIZE = 5 * 1024 * 1024  # smallest part S3 accepts
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request, tmp_path, monkeypatch):
+    if request.param == "local":
+        yield LocalStorage(str(tmp_path / "store"))
+        return
+
+    moto = pytest.importorskip("moto")
+    monkeypatch.setattr(settings, "s3_endpoint_url", None)
+    monkeypatch.setattr(settings, "s3_region", "us-east-1")
+    monkeypatch.setattr(settings, "s3_access_key_id", "testing")
+    monkeypatch.setattr(settings, "s3_secret_access_key", "testing")
+    monkeypatch.setattr(settings, "s3_multipart_chunk_size", PART_SIZE)
+    with moto.mock_aws():
+        backend = S3Storage(BUCKET, prefix="files/")
+        backend.client.create_bucket(Bucket=BUCKET)
+        yield backend
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Write a local file to be put into the store"""
+
+    def write(content: bytes) -> str:
+        path = tmp_path / f"upload-{os.urandom(4).hex()}.part"
+        path.write_bytes(content)
+        return str(path)
+
+    return write
+
+
+async def read_all(storage, location: str, offset: int, count: int, chunk_size: int) -> list:
+    return [chunk async for chunk in storage.read(location, offset, count, chunk_size)]
+
+
+@pytest.mark.asyncio
+async def test_put_moves_the_file_into_the_store(storage, source):
+    content = os.urandom(10_000)
+    path = source(content)
+    location = storage.blob_location(SHA256)
+
+    await storage.put(path, location)
+
+    assert not os.path.exists(path)
+    assert await storage.size(location) == len(content)
+    assert b"".join(await read_all(storage, location, 0, len(content), 4096)) == content
+
+
+@pytest.mark.asyncio
+async def test_put_of_a_large_file(storage, source):
+    content = os.urandom(2 * PART_SIZE + 1234)
+    location = storage.blob_location(SHA256)
+
+    await storage.put(source(content), location)
+
+    assert await storage.size(location) == len(content)
+    assert b"".join(await read_all(storage, location, 0, len(content), 1024 * 1024)) == content
+    if isinstance(storage, S3Storage):
+        # Uploaded in parts: multipart ETags end with the part count
+        head = storage.client.head_object(Bucket=BUCKET, Key=location)
+        assert head["ETag"].strip('"').endswith("-3")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("offset, count", [(0, 1), (100, 1000), (9_000, 1_000), (4_000, 4_096)])
+async def test_ranged_read(storage, source, offset, count):
+    content = os.urandom(10_000)
+    location = storage.blob_location(SHA256)
+    await storage.put(source(content), location)
+
+    chunks = await read_all(storage, location, offset, count, 512)
+
+    assert b"".join(chunks) == content[offset:offset + count]
+    assert all(len(chunk) <= 512 for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_read_of_nothing(storage, source):
+    location = storage.blob_location(SHA256)
+    await storage.put(source(b"content"), location)
+
+    assert await read_all(storage, location, 3, 0, 512) == []
+
+
+@pytest.mark.asyncio
+async def test_size_of_a_missing_key(storage):
+    assert await storage.size(storage.blob_location(SHA256)) is None
+
+
+@pytest.mark.asyncio
+async def test_delete(storage, source):
+    location = storage.blob_location(SHA256)
+    await storage.put(source(b"content"), location)
+
+    await storage.delete(location)
+
+    assert await storage.size(location) is None
+    # Deleting what is already gone is not an error
+    await storage.delete(location)
+
+
+def test_blob_locations_are_sharded(storage):
+    location = storage.blob_location(SHA256).replace(os.sep, "/")
+
+    assert location.endswith(f"blobs/ab/ab/{SHA256}")
+    if isinstance(storage, S3Storage):
+        assert location.startswith("files/")
+        assert storage.local_path(location) is None
+    else:
+        assert storage.local_path(location) == storage.blob_location(SHA256)